@@ -0,0 +1,280 @@
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+QUICKTIME_EPOCH = datetime.datetime(1904, 1, 1)
+DEFAULT_THRESHOLD = 0.10  # spowolnienie fazy o więcej niż 10% względem wzorca to regresja
+STARTUP_TARGET = 1.0  # okno programu powinno pojawić się wyraźnie szybciej niż w sekundę
+STARTUP_RUNS = 3
+
+# Czas od uruchomienia interpretera do narysowania formularza (bez ekranu: do zaimportowania modułów)
+STARTUP_SCRIPT = """
+import sys
+import time
+started = float(sys.argv[1])
+import tkinter as tk
+from gui import ImporterApp
+try:
+    root = tk.Tk()
+except tk.TclError:
+    print("imports", time.time() - started)
+    sys.exit(0)
+ImporterApp(root)
+root.update()
+print("window", time.time() - started)
+root.destroy()
+"""
+
+
+# Plik JPEG z prawdziwym segmentem APP1/EXIF (DateTimeOriginal) i wypełnieniem zamiast obrazu
+def make_jpeg(taken, payload_size, rng):
+    date_value = taken.strftime("%Y:%m:%d %H:%M:%S").encode("ascii") + b"\x00"
+    # Nagłówek TIFF (little endian), IFD0 z jednym wpisem: wskaźnik do Exif IFD
+    ifd0_offset = 8
+    exif_ifd_offset = ifd0_offset + 2 + 12 + 4
+    date_offset = exif_ifd_offset + 2 + 12 + 4
+    tiff = b"II*\x00" + struct.pack("<I", ifd0_offset)
+    tiff += struct.pack("<H", 1) + struct.pack("<HHII", 0x8769, 4, 1, exif_ifd_offset) + struct.pack("<I", 0)
+    tiff += struct.pack("<H", 1) + struct.pack("<HHII", 0x9003, 2, len(date_value), date_offset) + struct.pack("<I", 0)
+    tiff += date_value
+    app1 = b"Exif\x00\x00" + tiff
+    header = b"\xff\xd8" + b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1
+    return header + b"\xff\xda" + rng.randbytes(max(payload_size - len(header) - 4, 0)) + b"\xff\xd9"
+
+
+def make_box(box_type, body):
+    return struct.pack(">I4s", len(body) + 8, box_type) + body
+
+
+# Plik MP4 z atomem moov/mvhd; bez daty (0) jak w części rejestratorów
+def make_mp4(taken, payload_size, rng):
+    seconds = int((taken - QUICKTIME_EPOCH).total_seconds()) if taken else 0
+    mvhd = make_box(b"mvhd", b"\x00\x00\x00\x00" + struct.pack(">II", seconds, seconds) + bytes(88))
+    ftyp = make_box(b"ftyp", b"isom\x00\x00\x02\x00isomiso2mp41")
+    moov = make_box(b"moov", mvhd)
+    mdat = make_box(b"mdat", rng.randbytes(max(payload_size - len(ftyp) - len(moov) - 8, 0)))
+    return ftyp + mdat + moov
+
+
+# Syntetyczna karta: zdjęcia z telefonu, filmy GoPro/DJI, klipy z rejestratora i głęboko zagnieżdżony DCIM
+def generate_card(root, file_count, file_size, seed=0):
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 7, 1, 8, 0, 0)
+    total_size = 0
+    for i in range(file_count):
+        taken = start + datetime.timedelta(minutes=17 * i)
+        kind = i % 4
+        if kind == 0:
+            rel_path = os.path.join("DCIM", "Camera", f"IMG_{taken:%Y%m%d_%H%M%S}_{i}.jpg")
+            data = make_jpeg(taken, file_size, rng)
+        elif kind == 1:
+            rel_path = os.path.join("DCIM", f"{100 + i // 999}GOPRO", f"GX{i // 999 + 1:02d}{i % 10000:04d}.MP4")
+            data = make_mp4(taken, file_size, rng)
+        elif kind == 2:
+            rel_path = os.path.join("DCIM", "DJI_001", f"DJI_{i:04d}.MP4")
+            data = make_mp4(taken, file_size, rng)
+        else:
+            rel_path = os.path.join("Normal", "F", f"{taken:%Y_%m_%d}", "Front", "Clips",
+                                    f"{taken:%Y_%m_%d}_{i:06d}_F.MP4")
+            data = make_mp4(None, file_size, rng)
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(data)
+        total_size += len(data)
+    return total_size
+
+
+# Szczyt RSS całego procesu od jego startu (ru_maxrss) - wartość narastająca: faza pokazuje najwyższe
+# zużycie pamięci do swojego końca, więc wzrost względem poprzedniej fazy oznacza jej własny nowy szczyt
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje KB, macOS bajty
+    return peak / 1024 if sys.platform != "darwin" else peak / (1024 * 1024)
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.phases = {}
+
+    def measure(self, name, function, files=0, size=0):
+        started = time.perf_counter()
+        value = function()
+        seconds = time.perf_counter() - started
+        self.phases[name] = {"seconds": seconds, "peak_rss_mb": peak_rss_mb()}
+        self.set_volume(name, files, size)
+        return value
+
+    # Liczba plików i bajtów fazy; dla skanu znana dopiero po jego zakończeniu
+    def set_volume(self, name, files, size):
+        phase = self.phases[name]
+        seconds = phase["seconds"]
+        phase.update({
+            "files": files,
+            "bytes": size,
+            "files_per_s": files / seconds if seconds > 0 and files else None,
+            "mb_per_s": size / (1024 * 1024) / seconds if seconds > 0 and size else None,
+        })
+
+    def record(self, name, seconds, **fields):
+        self.phases[name] = dict({"seconds": seconds, "files": 0, "bytes": 0, "files_per_s": None, "mb_per_s": None,
+                                  "peak_rss_mb": None}, **fields)
+
+
+# Start programu w nowym procesie (tak jak po dwukliku); najlepszy z kilku pomiarów
+def measure_startup(runs=STARTUP_RUNS):
+    best = None
+    measured = None
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, repr(time.time())],
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout.split()
+        measured, seconds = output[0], float(output[1])
+        best = seconds if best is None else min(best, seconds)
+    return best, measured
+
+
+def run_benchmark(card, dest, workers, startup_runs=STARTUP_RUNS):
+    # Import silnika dopiero tutaj, po ustawieniu katalogu ustawień na katalog tymczasowy
+    from engine import LOG_STREAM_FILE, NAMING_AUTO, ImportJob, add_suffix, scan_media, write_log
+
+    timer = PhaseTimer()
+    if startup_runs:
+        seconds, measured = measure_startup(startup_runs)
+        timer.record("startup", seconds, measured=measured)
+    manifest = timer.measure("scan", lambda: scan_media(card))
+    count = len(manifest)
+    timer.set_volume("scan", count, 0)  # skan czyta tylko metadane - MB/s nie ma sensu
+    timer.measure("analyze", lambda: manifest.resolve_dates(use_exif=True, workers=workers, cache=None),
+                  count)
+
+    # Ponowna analiza świeżego skanu z wypełnioną pamięcią podręczną metadanych
+    from engine import MetadataCache
+    cache = MetadataCache()
+    warm_manifest = scan_media(card)
+    warm_manifest.resolve_dates(use_exif=True, workers=workers, cache=cache)
+    warm_manifest = scan_media(card)
+    timer.measure("analyze_warm", lambda: warm_manifest.resolve_dates(use_exif=True, workers=workers, cache=cache),
+                  count)
+
+    # Przebieg dat z importu na świeżym skanie - manifest z analizy ma już daty i zwróciłby wynik od razu
+    dates_manifest = scan_media(card)
+    timer.measure("dates", lambda: dates_manifest.resolve_dates(use_exif=True, workers=workers), count)
+
+    job = ImportJob(card, dest, {"naming": NAMING_AUTO, "source_short": "Bench", "date_workers": workers,
+                                 "log": True}, manifest=manifest)
+    result = timer.measure("copy", job.run, count, manifest.total_size)
+    dest_folder = timer.measure("suffix", lambda: add_suffix(result.dest_folder, result.extension_counts), count)
+
+    # Podsumowanie po imporcie: log tekstowy tworzony z logu JSON Lines i wynik wypisywany przez gen.py import
+    def summary():
+        write_log(os.path.join(dest_folder, LOG_STREAM_FILE), dest_folder, job.options, result.stats)
+        return json.dumps(result.to_dict(), ensure_ascii=False)
+
+    timer.measure("summary", summary, count)
+    return timer.phases
+
+
+def compare(phases, baseline, threshold):
+    regressions = []
+    for name, phase in phases.items():
+        reference = baseline.get("phases", {}).get(name)
+        if not reference or not reference["seconds"]:
+            continue
+        change = phase["seconds"] / reference["seconds"] - 1
+        phase["baseline_seconds"] = reference["seconds"]
+        phase["change"] = change
+        # Fazy poniżej 10 ms są zbyt zaszumione, żeby je porównywać
+        if change > threshold and phase["seconds"] > 0.01:
+            regressions.append(name)
+    return regressions
+
+
+def format_report(report):
+    lines = [f"Pliki: {report['files']}, rozmiar: {report['bytes'] / (1024 * 1024):.1f} MB"]
+    for name, phase in report["phases"].items():
+        line = f"{name:<14}{phase['seconds']:>10.3f} s"
+        if phase["files_per_s"]:
+            line += f"{phase['files_per_s']:>12.0f} plików/s"
+        if phase["mb_per_s"]:
+            line += f"{phase['mb_per_s']:>10.1f} MB/s"
+        if phase["peak_rss_mb"]:
+            line += f"   szczyt RSS (narastająco) {phase['peak_rss_mb']:.0f} MB"
+        if "change" in phase:
+            line += f"   {phase['change']:+.1%} wzgl. wzorca"
+        if name == "startup":
+            line += "   (okno)" if phase["measured"] == "window" else "   (bez ekranu: tylko import modułów)"
+            if phase["seconds"] > STARTUP_TARGET:
+                line += f"   UWAGA: powyżej {STARTUP_TARGET:.1f} s"
+        lines.append(line)
+    if report.get("regressions"):
+        lines.append("REGRESJE: " + ", ".join(report["regressions"]))
+    return "\n".join(lines)
+
+
+def main(argv):
+    from engine import DEFAULT_DATE_WORKERS
+
+    parser = argparse.ArgumentParser(description="Pomiar wydajności importu na syntetycznej karcie pamięci.")
+    parser.add_argument("--files", type=int, default=1000, help="liczba plików na karcie (np. 100 - 100000)")
+    parser.add_argument("--file-size", type=int, default=64, help="rozmiar pliku w KB")
+    parser.add_argument("--workers", type=int, default=DEFAULT_DATE_WORKERS, help="procesy odczytu dat")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="katalog roboczy (domyślnie tymczasowy, usuwany po pomiarze)")
+    parser.add_argument("--baseline", help="plik JSON z wynikami wzorcowymi do porównania")
+    parser.add_argument("--save-baseline", help="zapisz wyniki jako nowy wzorzec")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="dopuszczalne spowolnienie fazy")
+    parser.add_argument("--json", action="store_true", help="wypisz wyniki jako JSON")
+    parser.add_argument("--startup-runs", type=int, default=STARTUP_RUNS,
+                        help="liczba pomiarów czasu startu programu (0 - bez pomiaru)")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="importer-bench-")
+    card = os.path.join(workdir, "card")
+    dest = os.path.join(workdir, "dest")
+    # Pamięć podręczna metadanych i indeksy w katalogu roboczym, nie w ustawieniach użytkownika
+    os.environ["XDG_CONFIG_HOME"] = os.environ["APPDATA"] = os.path.join(workdir, "config")
+    try:
+        shutil.rmtree(card, ignore_errors=True)
+        shutil.rmtree(dest, ignore_errors=True)
+        total_size = generate_card(card, args.files, args.file_size * 1024, args.seed)
+        os.makedirs(dest)
+        report = {
+            "files": args.files,
+            "bytes": total_size,
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "phases": run_benchmark(card, dest, args.workers, args.startup_runs),
+        }
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            report["regressions"] = compare(report["phases"], json.load(file), args.threshold)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
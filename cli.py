@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import sys
+import threading
+
+from engine import (DEFAULT_DATE_WORKERS, DUPLICATES_COPY, DUPLICATES_HARDLINK, DUPLICATES_REFLINK, DUPLICATES_SKIP,
+                    JOURNAL_FILE, NAMING_AUTO, NAMING_DATE, NAMING_RANGE, OPERATION_COPY, OPERATION_MOVE,
+                    SUBFOLDER_DAILY, SUBFOLDER_NONE, ArchiveCatalog, DedupIndex, ImportFailed, ImportJob,
+                    get_short_name_from_source, load_sources, scan_media)
+
+BUFFER_CHOICES = {
+    "128k": "Mały (128 KB)",
+    "512k": "Średni (512 KB)",
+    "1m": "Duży (1 MB)",
+    "dynamic": "Dynamiczny",
+}
+NAMING_CHOICES = {
+    "auto": NAMING_AUTO,
+    "date": NAMING_DATE,
+    "range": NAMING_RANGE,
+}
+DUPLICATE_CHOICES = {
+    "copy": DUPLICATES_COPY,
+    "skip": DUPLICATES_SKIP,
+    "hardlink": DUPLICATES_HARDLINK,
+    "reflink": DUPLICATES_REFLINK,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="gen.py import",
+                                     description="Import multimediów z karty bez interfejsu graficznego. "
+                                                 "Postęp wypisywany jest jako JSON (jeden obiekt w linii).")
+    parser.add_argument("--source", help="źródło z source.txt - skrót (np. Tel_Jar) lub pełna nazwa")
+    parser.add_argument("--card", help="ścieżka do karty z multimediami")
+    parser.add_argument("--dest", help="lokalizacja wygenerowanego katalogu")
+    parser.add_argument("--resume", metavar="KATALOG",
+                        help="wznów przerwany import w podanym katalogu (ustawienia z dziennika importu; "
+                             "--card tylko gdy karta jest pod inną ścieżką)")
+    parser.add_argument("--move", action="store_true", help="przenoszenie zamiast kopiowania")
+    parser.add_argument("--verify", action="store_true", help="weryfikuj sumy kontrolne (plik .b2sum)")
+    parser.add_argument("--buffer", choices=BUFFER_CHOICES, default="dynamic", help="rozmiar bufora")
+    parser.add_argument("--filename-dates", action="store_true", help="odczytaj datę z nazwy pliku zamiast z EXIF")
+    parser.add_argument("--naming", choices=NAMING_CHOICES, default="auto", help="format nazwy folderu")
+    parser.add_argument("--suffix", action="store_true", help="dodaj P, M, PM do nazwy katalogu")
+    parser.add_argument("--single-folder", action="store_true",
+                        help="wszystkie pliki w jednym katalogu zamiast podkatalogów na każdy dzień")
+    parser.add_argument("--log", action="store_true", help="generuj plik log")
+    parser.add_argument("--incremental", action="store_true", help="pomiń pliki już zaimportowane z tego źródła")
+    parser.add_argument("--duplicates", choices=DUPLICATE_CHOICES, default="copy",
+                        help="postępowanie z plikami, których zawartość jest już w archiwum")
+    parser.add_argument("--workers", type=int, default=DEFAULT_DATE_WORKERS, help="procesy odczytu dat")
+    parser.add_argument("--profile", action="store_true", help="zapisz profil cProfile obok logu")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="tylko wypisz plan (docelowa ścieżka każdego pliku) bez kopiowania")
+    parser.add_argument("--no-pipeline", action="store_true",
+                        help="bez równoległego odczytu z karty i zapisu na dysk docelowy")
+    return parser
+
+
+# Dopasowanie --source do wpisu z source.txt; nieznany skrót jest używany bez zmian
+def resolve_source(value):
+    for source_entry in load_sources():
+        if value in (source_entry, get_short_name_from_source(source_entry)):
+            return source_entry, get_short_name_from_source(source_entry)
+    return value, get_short_name_from_source(value) or value
+
+
+def print_event(event):
+    if event["event"] == "manifest":
+        return
+    if event["event"] == "finished":
+        event = {"event": "finished", "result": event["result"].to_dict()}
+    print(json.dumps(event, ensure_ascii=False), flush=True)
+
+
+def build_job(parser, args):
+    # Ścieżki bezwzględne - indeks importów jest wspólny dla uruchomień z różnych katalogów bieżących
+    args.card, args.dest, args.resume = (os.path.abspath(path) if path else path
+                                         for path in (args.card, args.dest, args.resume))
+    if args.resume:
+        if not os.path.isfile(os.path.join(args.resume, JOURNAL_FILE)):
+            parser.error(f"w katalogu {args.resume} nie ma przerwanego importu")
+        return ImportJob.resume(args.resume, args.card, report=print_event)
+    if not (args.source and args.card and args.dest):
+        parser.error("wymagane są --source, --card i --dest (lub --resume)")
+
+    source_entry, source_short = resolve_source(args.source)
+    options = {
+        "operation": OPERATION_MOVE if args.move else OPERATION_COPY,
+        "buffer": BUFFER_CHOICES[args.buffer],
+        "use_exif": not args.filename_dates,
+        "date_workers": max(1, args.workers),
+        "naming": NAMING_CHOICES[args.naming],
+        "source_short": source_short,
+        "source_entry": source_entry,
+        "suffix": args.suffix,
+        "subfolder": SUBFOLDER_NONE if args.single_folder else SUBFOLDER_DAILY,
+        "log": args.log,
+        "incremental": args.incremental,
+        "verify": args.verify,
+        "duplicates": DUPLICATE_CHOICES[args.duplicates],
+        "profile": args.profile,
+        "pipeline": not args.no_pipeline,
+        "dry_run": args.dry_run,
+    }
+    return ImportJob(args.card, args.dest, options, report=print_event)
+
+
+def main(argv):
+    parser = build_parser()
+    job = build_job(parser, parser.parse_args(argv))
+
+    # Import w osobnym wątku, żeby Ctrl+C przerywał dopiero po bieżącym pliku
+    failure = []
+
+    def run():
+        try:
+            job.run()
+        except ImportFailed as e:
+            failure.append(str(e))
+        except Exception as e:
+            failure.append(f"Wystąpił błąd: {e}")
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(0.5)
+    except KeyboardInterrupt:
+        job.cancel()
+        worker.join()
+
+    if failure:
+        print(json.dumps({"event": "error", "message": failure[0]}, ensure_ascii=False), flush=True)
+        return 1
+    return 0
+
+
+def build_catalog_parser():
+    parser = argparse.ArgumentParser(prog="gen.py catalog",
+                                     description="Katalog archiwum (data, źródło, rozmiar, skrót i ścieżka pliku).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild = commands.add_parser("rebuild", help="zbuduj katalog od nowa z istniejącego drzewa archiwum "
+                                                    "(uzgadnia też indeks duplikatów)")
+    rebuild.add_argument("archive", help="katalog archiwum (lokalizacja wygenerowanych katalogów)")
+    rebuild.add_argument("--hashes", action="store_true", help="policz też skróty częściowe plików")
+    query = commands.add_parser("query", help="wypisz pliki z katalogu (jeden obiekt JSON w linii)")
+    query.add_argument("archive", help="katalog archiwum")
+    query.add_argument("--from", dest="date_from", metavar="RRRR-MM-DD", help="od daty (włącznie)")
+    query.add_argument("--to", dest="date_to", metavar="RRRR-MM-DD", help="do daty (włącznie)")
+    query.add_argument("--source", help="skrót źródła, np. Tel_Jar")
+    return parser
+
+
+def catalog_main(argv):
+    args = build_catalog_parser().parse_args(argv)
+    catalog = ArchiveCatalog(args.archive)
+    if args.command == "rebuild":
+        # Jeden przegląd drzewa dla katalogu i indeksu duplikatów (pliki skopiowane do archiwum ręcznie)
+        manifest = scan_media(args.archive)
+        count = catalog.rebuild(hashes=args.hashes, manifest=manifest)
+        dedup = DedupIndex(args.archive)
+        try:
+            dedup.rebuild(manifest)
+        finally:
+            dedup.save()
+        print(json.dumps({"event": "catalog", "files": count, "path": catalog.path}, ensure_ascii=False))
+        return 0
+    for rel_path, date, source, size, partial_hash, full_hash in catalog.query(args.date_from, args.date_to,
+                                                                                args.source):
+        print(json.dumps({"path": os.path.join(args.archive, rel_path), "date": date, "source": source,
+                          "size": size, "partial_hash": partial_hash, "full_hash": full_hash}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,2775 @@
+import os
+import array
+import re
+import sys
+import struct
+import hashlib
+import shutil
+import datetime
+import threading
+import queue
+import time
+import sqlite3
+import contextlib
+import heapq
+import collections
+import json
+import io
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+JPEG_EXTENSIONS = {'.jpg', '.jpeg', '.jpe'}
+TIFF_EXTENSIONS = {'.tif', '.tiff', '.dng', '.nef', '.cr2', '.arw'}
+HEIF_EXTENSIONS = {'.heic', '.heif', '.avif'}
+QUICKTIME_EXTENSIONS = {'.mp4', '.mov', '.m4v', '.3gp', '.lrv', '.insv'}
+PIL_EXTENSIONS = {'.png', '.webp'}  # formaty bez własnego parsera - odczyt przez PIL
+
+EXIF_IFD_POINTER = 0x8769
+EXIF_DATE_TIME_ORIGINAL = 0x9003
+MAX_IFD_ENTRIES = 1000
+MAX_HEIF_META_SIZE = 1024 * 1024
+QUICKTIME_EPOCH = datetime.datetime(1904, 1, 1)
+
+
+def parse_exif_date(value):
+    try:
+        return datetime.datetime.strptime(value.strip(), "%Y:%m:%d %H:%M:%S").date()
+    except ValueError:
+        return None
+
+
+def read_tiff_endian(read):
+    header = read(0, 8)
+    if header[:4] == b"II*\x00":
+        return "<", struct.unpack("<I", header[4:8])[0]
+    if header[:4] == b"MM\x00*":
+        return ">", struct.unpack(">I", header[4:8])[0]
+    return None, None
+
+
+# Wpisy katalogu IFD jako {tag: (typ, liczba, wartość)}; read(offset, size) zwraca bajty względem nagłówka TIFF
+def read_tiff_ifd(read, endian, ifd_offset):
+    count = struct.unpack(endian + "H", read(ifd_offset, 2))[0]
+    if count > MAX_IFD_ENTRIES:
+        return {}
+    entries = read(ifd_offset + 2, count * 12)
+    tags = {}
+    for i in range(0, len(entries) - 11, 12):
+        tag, value_type, value_count, value = struct.unpack(endian + "HHII", entries[i:i + 12])
+        tags[tag] = (value_type, value_count, value)
+    return tags
+
+
+# Odczyt DateTimeOriginal z nagłówka TIFF; read(offset, size) zwraca bajty względem początku nagłówka
+def read_tiff_date(read):
+    endian, ifd0_offset = read_tiff_endian(read)
+    if endian is None:
+        return None
+    pointer = read_tiff_ifd(read, endian, ifd0_offset).get(EXIF_IFD_POINTER)
+    if not pointer:
+        return None
+    date_tag = read_tiff_ifd(read, endian, pointer[2]).get(EXIF_DATE_TIME_ORIGINAL)
+    if not date_tag or date_tag[1] <= 4:
+        return None
+    raw = read(date_tag[2], date_tag[1])
+    return parse_exif_date(raw.split(b"\x00", 1)[0].decode("ascii", "replace"))
+
+
+# Segmenty JPEG o podanych znacznikach (np. 0xE1 - APP1) jako (znacznik, zawartość); pozostałe są pomijane
+def iter_jpeg_segments(file, wanted):
+    if file.read(2) != b"\xff\xd8":
+        return
+    while True:
+        marker = file.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return
+        # Znaczniki 0xD9 (EOI) i 0xDA (SOS) - dalej są już dane obrazu
+        if marker[1] in (0xD9, 0xDA):
+            return
+        length = struct.unpack(">H", file.read(2))[0]
+        if length < 2:
+            return
+        if marker[1] in wanted:
+            yield marker[1], file.read(length - 2)
+        else:
+            file.seek(length - 2, os.SEEK_CUR)
+
+
+def read_jpeg_date(file):
+    for _, payload in iter_jpeg_segments(file, (0xE1,)):
+        if payload[:6] == b"Exif\x00\x00":
+            tiff = payload[6:]
+            return read_tiff_date(lambda offset, size: tiff[offset:offset + size])
+    return None
+
+
+def read_file_tiff_date(file):
+    def read(offset, size):
+        file.seek(offset)
+        return file.read(size)
+    return read_tiff_date(read)
+
+
+# Iteracja po pudełkach ISO BMFF (MP4/MOV/HEIF) w zakresie [start, end) bez czytania ich zawartości
+def iter_boxes(file, start, end):
+    offset = start
+    while end is None or offset + 8 <= end:
+        file.seek(offset)
+        header = file.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", file.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            file.seek(0, os.SEEK_END)
+            size = file.tell() - offset
+        if size < header_size:
+            return
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+
+def read_quicktime_date(file):
+    for box_type, body_start, body_end in iter_boxes(file, 0, None):
+        if box_type != b"moov":
+            continue
+        for child_type, child_start, child_end in iter_boxes(file, body_start, body_end):
+            if child_type != b"mvhd":
+                continue
+            file.seek(child_start)
+            version = file.read(4)[0]
+            if version == 1:
+                seconds = struct.unpack(">Q", file.read(8))[0]
+            else:
+                seconds = struct.unpack(">I", file.read(4))[0]
+            if not seconds:
+                return None
+            return (QUICKTIME_EPOCH + datetime.timedelta(seconds=seconds)).date()
+        return None
+    return None
+
+
+# Funkcja read(offset, size) dla nagłówka TIFF z elementu Exif pliku HEIF/HEIC albo None
+def find_heif_exif(file):
+    for box_type, body_start, body_end in iter_boxes(file, 0, None):
+        if box_type == b"meta":
+            break
+    else:
+        return None
+    if body_end - body_start > MAX_HEIF_META_SIZE:
+        return None
+    file.seek(body_start)
+    meta = file.read(body_end - body_start)
+
+    def read_uint(data, offset, size):
+        if size == 0:
+            return 0, offset
+        return int.from_bytes(data[offset:offset + size], "big"), offset + size
+
+    # Pudełko meta zaczyna się od wersji i flag, dalej są pudełka potomne
+    children = {}
+    offset = 4
+    while offset + 8 <= len(meta):
+        size, child_type = struct.unpack(">I4s", meta[offset:offset + 8])
+        if size < 8:
+            break
+        children[child_type] = meta[offset + 8:offset + size]
+        offset += size
+    iinf = children.get(b"iinf")
+    iloc = children.get(b"iloc")
+    if not iinf or not iloc:
+        return None
+
+    exif_item_id = None
+    offset = 6 if iinf[0] == 0 else 8
+    while offset + 8 <= len(iinf):
+        size, child_type = struct.unpack(">I4s", iinf[offset:offset + 8])
+        if size < 8:
+            break
+        infe = iinf[offset + 8:offset + size]
+        if child_type == b"infe" and infe[0] >= 2:
+            id_size = 2 if infe[0] == 2 else 4
+            item_id = int.from_bytes(infe[4:4 + id_size], "big")
+            if infe[4 + id_size + 2:4 + id_size + 6] == b"Exif":
+                exif_item_id = item_id
+                break
+        offset += size
+    if exif_item_id is None:
+        return None
+
+    version = iloc[0]
+    offset_size, length_size = iloc[4] >> 4, iloc[4] & 0x0F
+    base_offset_size, index_size = iloc[5] >> 4, iloc[5] & 0x0F
+    if version < 1:
+        index_size = 0
+    id_size = 2 if version < 2 else 4
+    item_count, offset = read_uint(iloc, 6, id_size)
+    for _ in range(item_count):
+        item_id, offset = read_uint(iloc, offset, id_size)
+        construction_method = 0
+        if version in (1, 2):
+            construction_method, offset = read_uint(iloc, offset, 2)
+            construction_method &= 0x0F
+        offset += 2  # data_reference_index
+        base_offset, offset = read_uint(iloc, offset, base_offset_size)
+        extent_count, offset = read_uint(iloc, offset, 2)
+        extents = []
+        for _ in range(extent_count):
+            offset += index_size
+            extent_offset, offset = read_uint(iloc, offset, offset_size)
+            extent_length, offset = read_uint(iloc, offset, length_size)
+            extents.append((extent_offset, extent_length))
+        if item_id != exif_item_id:
+            continue
+        if construction_method != 0 or not extents:
+            return None
+        exif_start = base_offset + extents[0][0]
+        file.seek(exif_start)
+        # Element Exif zaczyna się od przesunięcia do nagłówka TIFF (zwykle za "Exif\0\0")
+        tiff_start = exif_start + 4 + struct.unpack(">I", file.read(4))[0]
+
+        def read(tiff_offset, size):
+            file.seek(tiff_start + tiff_offset)
+            return file.read(size)
+        return read
+    return None
+
+
+def read_heif_date(file):
+    read = find_heif_exif(file)
+    return read_tiff_date(read) if read else None
+
+
+def read_pil_date(filepath):
+    # PIL ładowany dopiero przy pierwszym pliku PNG/WebP - nie spowalnia startu programu
+    from PIL import Image
+    with Image.open(filepath) as image:
+        value = image.getexif().get_ifd(EXIF_IFD_POINTER).get(EXIF_DATE_TIME_ORIGINAL)
+    return parse_exif_date(value) if isinstance(value, str) else None
+
+
+HEADER_DATE_READERS = [
+    (JPEG_EXTENSIONS, read_jpeg_date),
+    (TIFF_EXTENSIONS, read_file_tiff_date),
+    (HEIF_EXTENSIONS, read_heif_date),
+    (QUICKTIME_EXTENSIONS, read_quicktime_date),
+]
+
+
+# Funkcja do pobierania daty z EXIF (zdjęcia) lub nagłówka mvhd (filmy) - czyta tylko nagłówki pliku
+def get_exif_date_taken(filepath):
+    ext = os.path.splitext(filepath)[1].lower()
+    try:
+        for extensions, reader in HEADER_DATE_READERS:
+            if ext in extensions:
+                with open(filepath, "rb") as file:
+                    return reader(file)
+        if ext in PIL_EXTENSIONS:
+            return read_pil_date(filepath)
+    except (OSError, ValueError, IndexError, struct.error, SyntaxError):
+        return None
+    return None
+
+
+# Reguły daty w nazwie pliku w kolejności ważności: najpierw formaty konkretnych urządzeń, potem ogólne.
+# Reguła bez grup oznacza nazwę bez daty - licznik GoPro/DJI nie może trafić do reguł ogólnych.
+# Wzorce używają tylko \d i liter, więc to, która reguła pasuje, zależy wyłącznie od kształtu nazwy.
+FILENAME_DATE_RULES = [
+    ("android", re.compile(r"^(?:IMG|VID|PXL|MVIMG|PANO|Screenshot)[_-](\d{4})(\d{2})(\d{2})[_-]\d{6}",
+                           re.IGNORECASE)),
+    ("dji", re.compile(r"^DJI_(\d{4})(\d{2})(\d{2})\d{6}_\d{4}", re.IGNORECASE)),
+    ("dji_counter", re.compile(r"^DJI_\d{4}(?!\d)", re.IGNORECASE)),
+    ("gopro", re.compile(r"^(?:G[HXLS]\d{6}|GOPR\d{4}|GP\d{6})(?!\d)", re.IGNORECASE)),
+    ("dashcam", re.compile(r"(?<!\d)(\d{4})_(\d{2})(\d{2})_\d{6}(?!\d)")),
+    ("separated", re.compile(r"(?<!\d)(\d{4})[_-](\d{2})[_-](\d{2})(?!\d)")),  # format 2024_05-10
+    ("compact", re.compile(r"(?<!\d)(\d{4})(\d{2})(\d{2})(?=\d{6}(?!\d)|\d{9}(?!\d)|(?!\d))")),  # 20240510
+    ("short", re.compile(r"(?<!\d)(\d{2})(\d{2})(\d{2})(?!\d)")),  # format 240510
+    ("short_separated", re.compile(r"(?<!\d)(\d{2})[_-](\d{2})[_-](\d{2})(?!\d)")),  # format 24-05-10
+]
+PLAUSIBLE_MIN_YEAR = 1990  # starsze daty w nazwie to liczniki plików, a nie data nagrania
+DIGITS_TO_ZERO = str.maketrans("123456789", "000000000")
+
+
+# Data z dopasowania reguły albo None, gdy wygląda na licznik (rok spoza zakresu, data z przyszłości)
+def plausible_date(match, latest):
+    year, month, day = (int(group) for group in match.groups())
+    if year < 100:
+        year += 2000
+    try:
+        date = datetime.date(year, month, day)
+    except ValueError:
+        return None
+    return date if PLAUSIBLE_MIN_YEAR <= year and date <= latest else None
+
+
+# Odczyt dat z nazw całej paczki plików w jednym przebiegu. Pierwsza pasująca reguła jest zapamiętywana dla
+# kształtu nazwy (cyfry zamienione na 0), więc pliki z jednej karty zwykle sprawdzają tylko jeden wzorzec.
+class FilenameDateResolver:
+    def __init__(self):
+        self.rule_by_shape = {}
+        # Jutro - karta z innej strefy czasowej może mieć pliki z datą o dzień późniejszą. Resolver tworzony
+        # jest dla każdej paczki, więc granica jest aktualna także przy formularzu otwartym przez kilka dni.
+        self.latest = datetime.date.today() + datetime.timedelta(days=1)
+
+    def first_rule(self, shape):
+        for index, (_, pattern) in enumerate(FILENAME_DATE_RULES):
+            if pattern.search(shape):
+                return index
+        return None
+
+    def resolve(self, filename):
+        shape = filename.translate(DIGITS_TO_ZERO)
+        try:
+            index = self.rule_by_shape[shape]
+        except KeyError:
+            index = self.rule_by_shape[shape] = self.first_rule(shape)
+        while index is not None:
+            pattern = FILENAME_DATE_RULES[index][1]
+            if not pattern.groups:
+                return None
+            date = plausible_date(pattern.search(filename), self.latest)
+            if date is not None:
+                return date
+            # Niewiarygodna data - szukamy dalej od następnej reguły pasującej do kształtu nazwy
+            index = next((later for later in range(index + 1, len(FILENAME_DATE_RULES))
+                          if FILENAME_DATE_RULES[later][1].search(shape)), None)
+        return None
+
+    def resolve_batch(self, filenames):
+        return [self.resolve(filename) for filename in filenames]
+
+
+# Funkcja do pobierania daty utworzenia z wyniku stat (bez ponownego odczytu z dysku)
+def get_creation_date_from_stat(ctime):
+    try:
+        return datetime.date.fromtimestamp(ctime)
+    except (OSError, ValueError, OverflowError):
+        return None
+
+
+# Odczyt dat EXIF dla paczki plików - wywoływany w procesach puli; zwraca też czas odczytu każdego pliku
+def read_exif_dates(paths):
+    results = []
+    for path in paths:
+        started = time.perf_counter()
+        date_taken = get_exif_date_taken(path)
+        results.append((date_taken, time.perf_counter() - started))
+    return results
+
+
+SLOWEST_FILES = 10
+
+
+# Pomiar czasu, liczby wywołań i bajtów dla gorących ścieżek importu oraz N najwolniejszych plików
+class Instrumentation:
+    def __init__(self, slowest_count=SLOWEST_FILES):
+        self.slowest_count = slowest_count
+        self.phases = {}
+
+    def add(self, phase, seconds, path=None, size=0, count=1):
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = {"count": 0, "seconds": 0.0, "bytes": 0, "slowest": []}
+        stats["count"] += count
+        stats["seconds"] += seconds
+        stats["bytes"] += size
+        if path is not None:
+            if len(stats["slowest"]) < self.slowest_count:
+                heapq.heappush(stats["slowest"], (seconds, path))
+            elif seconds > stats["slowest"][0][0]:
+                heapq.heapreplace(stats["slowest"], (seconds, path))
+
+    def call(self, phase, function, *args, path=None, size=0):
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.add(phase, time.perf_counter() - started, path, size)
+
+    @contextlib.contextmanager
+    def measure(self, phase, path=None, size=0, count=1):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - started, path, size, count)
+
+    def to_dict(self):
+        phases = {}
+        for phase, stats in self.phases.items():
+            phases[phase] = {
+                "count": stats["count"],
+                "seconds": round(stats["seconds"], 6),
+                "bytes": stats["bytes"],
+                "mb_per_s": (round(stats["bytes"] / (1024 * 1024) / stats["seconds"], 3)
+                             if stats["bytes"] and stats["seconds"] > 0 else None),
+                "slowest": [{"path": path, "seconds": round(seconds, 6)}
+                            for seconds, path in sorted(stats["slowest"], reverse=True)],
+            }
+        return phases
+
+    def format_lines(self):
+        lines = ["Statystyki (faza: liczba, czas, dane):"]
+        for phase, stats in self.to_dict().items():
+            line = f"  {phase}: {stats['count']}, {stats['seconds']:.3f} s"
+            if stats["bytes"]:
+                line += f", {stats['bytes'] / (1024 * 1024):.2f} MB"
+            if stats["mb_per_s"]:
+                line += f", {stats['mb_per_s']:.2f} MB/s"
+            lines.append(line)
+        for phase, stats in self.to_dict().items():
+            if stats["slowest"]:
+                lines.append(f"Najwolniejsze pliki - {phase}:")
+                lines.extend(f"  {item['seconds']:.3f} s  {item['path']}" for item in stats["slowest"])
+        return lines
+
+
+# Wersja bez pomiarów - te same wywołania, zerowy narzut na zapis statystyk
+class NullInstrumentation(Instrumentation):
+    def add(self, phase, seconds, path=None, size=0, count=1):
+        pass
+
+    def call(self, phase, function, *args, path=None, size=0):
+        return function(*args)
+
+
+DEFAULT_DATE_WORKERS = min(os.cpu_count() or 1, 8)
+PARALLEL_EXIF_MIN_FILES = 64  # poniżej tej liczby start puli procesów kosztuje więcej niż zysk
+EXIF_BATCH_SIZE = 256
+
+
+# Katalog ustawień użytkownika (pamięć podręczna metadanych itp.)
+def get_config_dir():
+    if os.name == 'nt':
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "Importer")
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "importer")
+
+
+def get_mount_point(path):
+    path = os.path.abspath(path)
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+# Identyfikator nośnika niezależny od litery dysku / punktu montowania, jeśli system go udostępnia
+def get_volume_id(mount_point):
+    if os.name == 'nt':
+        try:
+            import ctypes
+            serial = ctypes.c_uint32()
+            root = os.path.splitdrive(mount_point)[0] + "\\"
+            if ctypes.windll.kernel32.GetVolumeInformationW(root, None, 0, ctypes.byref(serial), None, None,
+                                                            None, 0):
+                return f"serial:{serial.value:08X}"
+        except (OSError, AttributeError):
+            pass
+        return f"path:{mount_point}"
+    try:
+        device = os.stat(mount_point).st_dev
+        by_uuid = "/dev/disk/by-uuid"
+        for uuid in os.listdir(by_uuid):
+            if os.stat(os.path.join(by_uuid, uuid)).st_rdev == device:
+                return f"uuid:{uuid}"
+    except OSError:
+        pass
+    return f"path:{mount_point}"
+
+
+METADATA_CACHE_FILE = "metadata_cache.sqlite"
+METADATA_CACHE_MAX_ENTRIES = 500000
+
+
+# Trwała pamięć podręczna dat EXIF, kluczowana nośnikiem, ścieżką względną, rozmiarem i mtime.
+# Zapamiętywany jest wynik odczytu nagłówka (również brak daty) - nazwa pliku i ctime są już w manifeście.
+class MetadataCache:
+    def __init__(self, path=None, max_entries=METADATA_CACHE_MAX_ENTRIES):
+        self.path = path or os.path.join(get_config_dir(), METADATA_CACHE_FILE)
+        self.max_entries = max_entries
+
+    def connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("CREATE TABLE IF NOT EXISTS exif_dates ("
+                           "volume TEXT NOT NULL, rel_path TEXT NOT NULL, size INTEGER NOT NULL, "
+                           "mtime REAL NOT NULL, exif_date TEXT, last_used INTEGER NOT NULL, "
+                           "PRIMARY KEY (volume, rel_path))")
+        connection.execute("CREATE INDEX IF NOT EXISTS exif_dates_last_used ON exif_dates (last_used)")
+        return connection
+
+    @staticmethod
+    def keys_for(entries, root):
+        mount_point = get_mount_point(root)
+        volume = get_volume_id(mount_point)
+        return volume, [os.path.relpath(entry.path, mount_point) for entry in entries]
+
+    def lookup(self, entries, root):
+        if not entries:
+            return
+        volume, rel_paths = self.keys_for(entries, root)
+        now = int(time.time())
+        connection = self.connect()
+        try:
+            with connection:
+                rows = {rel_path: (size, mtime, exif_date) for rel_path, size, mtime, exif_date in connection.execute(
+                    "SELECT rel_path, size, mtime, exif_date FROM exif_dates WHERE volume = ?", (volume,))}
+                hits = []
+                for entry, rel_path in zip(entries, rel_paths):
+                    row = rows.get(rel_path)
+                    if row and row[0] == entry.size and row[1] == entry.mtime:
+                        entry.exif_date = datetime.date.fromisoformat(row[2]) if row[2] else None
+                        hits.append((now, volume, rel_path))
+                connection.executemany("UPDATE exif_dates SET last_used = ? WHERE volume = ? AND rel_path = ?", hits)
+        finally:
+            connection.close()
+
+    def store(self, entries, root):
+        if not entries:
+            return
+        volume, rel_paths = self.keys_for(entries, root)
+        now = int(time.time())
+        connection = self.connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO exif_dates (volume, rel_path, size, mtime, exif_date, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(volume, rel_path, entry.size, entry.mtime,
+                      entry.exif_date.isoformat() if entry.exif_date else None, now)
+                     for entry, rel_path in zip(entries, rel_paths)])
+                # Usuwanie najdawniej używanych wpisów ponad limit
+                count = connection.execute("SELECT COUNT(*) FROM exif_dates").fetchone()[0]
+                if count > self.max_entries:
+                    connection.execute("DELETE FROM exif_dates WHERE rowid IN (SELECT rowid FROM exif_dates "
+                                       "ORDER BY last_used LIMIT ?)", (count - self.max_entries,))
+        finally:
+            connection.close()
+
+
+EXIF_ORIENTATION = 0x0112
+EXIF_THUMBNAIL_OFFSET = 0x0201
+EXIF_THUMBNAIL_LENGTH = 0x0202
+MAX_THUMBNAIL_BYTES = 512 * 1024
+MAX_PIL_PREVIEW_BYTES = 4 * 1024 * 1024  # pliki bez miniatury dekodowane w całości tylko do tego rozmiaru
+THUMBNAIL_SIZE = (160, 120)
+THUMBNAIL_CACHE_FILE = "thumbnails.sqlite"
+THUMBNAIL_CACHE_MAX_BYTES = 200 * 1024 * 1024
+THUMBNAIL_WORKERS = 4
+THUMBNAIL_STORE_BATCH = 32
+
+
+# Miniatura JPEG z IFD1 nagłówka TIFF (APP1 w JPEG, TIFF, DNG, Exif w HEIF) i orientacja zdjęcia z IFD0
+def read_tiff_thumbnail(read):
+    endian, ifd0_offset = read_tiff_endian(read)
+    if endian is None:
+        return None, 1
+    ifd0 = read_tiff_ifd(read, endian, ifd0_offset)
+    orientation = 1
+    if EXIF_ORIENTATION in ifd0:
+        value = ifd0[EXIF_ORIENTATION][2]
+        # Wartość SHORT zajmuje pierwsze dwa bajty pola
+        orientation = value & 0xFFFF if endian == "<" else value >> 16
+    # Za wpisami IFD0 jest przesunięcie IFD1 (miniatury)
+    count = struct.unpack(endian + "H", read(ifd0_offset, 2))[0]
+    next_ifd = read(ifd0_offset + 2 + count * 12, 4)
+    if len(next_ifd) < 4:
+        return None, orientation
+    ifd1_offset = struct.unpack(endian + "I", next_ifd)[0]
+    if not ifd1_offset:
+        return None, orientation
+    ifd1 = read_tiff_ifd(read, endian, ifd1_offset)
+    if EXIF_THUMBNAIL_OFFSET not in ifd1 or EXIF_THUMBNAIL_LENGTH not in ifd1:
+        return None, orientation
+    length = ifd1[EXIF_THUMBNAIL_LENGTH][2]
+    if not 0 < length <= MAX_THUMBNAIL_BYTES:
+        return None, orientation
+    data = read(ifd1[EXIF_THUMBNAIL_OFFSET][2], length)
+    return (data if data[:2] == b"\xff\xd8" else None), orientation
+
+
+def read_jpeg_thumbnail(file):
+    jfif_thumbnail = None
+    for marker, payload in iter_jpeg_segments(file, (0xE0, 0xE1)):
+        if marker == 0xE1 and payload[:6] == b"Exif\x00\x00":
+            tiff = payload[6:]
+            data, orientation = read_tiff_thumbnail(lambda offset, size: tiff[offset:offset + size])
+            if data:
+                return data, orientation
+        # Rozszerzenie JFXX z miniaturą zakodowaną jako JPEG (kod 0x10)
+        elif marker == 0xE0 and payload[:5] == b"JFXX\x00" and payload[5:6] == b"\x10":
+            jfif_thumbnail = payload[6:]
+    return jfif_thumbnail, 1
+
+
+def read_file_tiff_thumbnail(file):
+    def read(offset, size):
+        file.seek(offset)
+        return file.read(size)
+    return read_tiff_thumbnail(read)
+
+
+def read_heif_thumbnail(file):
+    read = find_heif_exif(file)
+    return read_tiff_thumbnail(read) if read else (None, 1)
+
+
+# Okładka filmu z nagłówka: pudełko covr (moov/udta/meta/ilst) lub obraz JPEG zapisany wprost w udta
+def read_quicktime_thumbnail(file):
+    containers = {b"moov", b"udta", b"meta", b"ilst", b"covr"}
+
+    def search(start, end, depth):
+        for box_type, body_start, body_end in iter_boxes(file, start, end):
+            if box_type == b"mdat" or (box_type != b"moov" and body_end - body_start > MAX_HEIF_META_SIZE):
+                continue
+            if box_type in containers and depth < 6:
+                file.seek(body_start)
+                head = file.read(12)
+                # meta w MP4 ma wersję i flagi przed pudełkami potomnymi, w QuickTime nie
+                skip = 4 if box_type == b"meta" and head[8:12] == b"hdlr" else 0
+                found = search(body_start + skip, body_end, depth + 1)
+                if found:
+                    return found
+            elif box_type == b"data":
+                file.seek(body_start + 8)
+                data = file.read(min(body_end - body_start - 8, MAX_THUMBNAIL_BYTES))
+                if data[:2] == b"\xff\xd8" or data[:8] == b"\x89PNG\r\n\x1a\n":
+                    return data
+            elif depth >= 2 and body_end - body_start <= MAX_THUMBNAIL_BYTES:
+                file.seek(body_start)
+                if file.read(2) == b"\xff\xd8":
+                    file.seek(body_start)
+                    return file.read(body_end - body_start)
+        return None
+
+    return search(0, None, 0), 1
+
+
+HEADER_THUMBNAIL_READERS = [
+    (JPEG_EXTENSIONS, read_jpeg_thumbnail),
+    (TIFF_EXTENSIONS, read_file_tiff_thumbnail),
+    (HEIF_EXTENSIONS, read_heif_thumbnail),
+    (QUICKTIME_EXTENSIONS, read_quicktime_thumbnail),
+]
+
+
+# Osadzona miniatura pliku (bajty JPEG/PNG, orientacja) - tylko z nagłówków, bez dekodowania zdjęcia.
+# Dla filmów najpierw plik .THM obok (GoPro, DJI, aparaty), potem okładka w nagłówku.
+def read_embedded_thumbnail(filepath):
+    stem, ext = os.path.splitext(filepath)
+    ext = ext.lower()
+    try:
+        if ext in QUICKTIME_EXTENSIONS:
+            for thm_ext in (".THM", ".thm"):
+                if os.path.exists(stem + thm_ext) and os.path.getsize(stem + thm_ext) <= MAX_THUMBNAIL_BYTES:
+                    with open(stem + thm_ext, "rb") as file:
+                        return file.read(), 1
+        for extensions, reader in HEADER_THUMBNAIL_READERS:
+            if ext in extensions:
+                with open(filepath, "rb") as file:
+                    return reader(file)
+    except (OSError, ValueError, IndexError, struct.error):
+        return None, 1
+    return None, 1
+
+
+# Miniatura gotowa do wyświetlenia (PNG w rozmiarze THUMBNAIL_SIZE) albo None, jeśli plik jej nie ma
+def make_thumbnail(filepath, size):
+    data, orientation = read_embedded_thumbnail(filepath)
+    ext = os.path.splitext(filepath)[1].lower()
+    source = None
+    if data:
+        source = io.BytesIO(data)
+    elif (ext in PIL_EXTENSIONS or ext in JPEG_EXTENSIONS) and size <= MAX_PIL_PREVIEW_BYTES:
+        source = filepath
+    if source is None:
+        return None
+    from PIL import Image
+    try:
+        with Image.open(source) as image:
+            # JPEG dekodowany od razu w zmniejszonej skali
+            image.draft("RGB", THUMBNAIL_SIZE)
+            image = image.convert("RGB")
+            transpose = {3: Image.Transpose.ROTATE_180, 6: Image.Transpose.ROTATE_270,
+                         8: Image.Transpose.ROTATE_90}.get(orientation)
+            if transpose is not None:
+                image = image.transpose(transpose)
+            image.thumbnail(THUMBNAIL_SIZE)
+            output = io.BytesIO()
+            image.save(output, "PNG")
+            return output.getvalue()
+    except (OSError, ValueError, SyntaxError):
+        return None
+
+
+# Miniatury na dysku w katalogu ustawień; łączny rozmiar ograniczony, najdawniej oglądane są usuwane.
+# Zapamiętywany jest też brak miniatury, żeby nie czytać takiego pliku ponownie.
+class ThumbnailCache:
+    def __init__(self, path=None, max_bytes=THUMBNAIL_CACHE_MAX_BYTES):
+        self.path = path or os.path.join(get_config_dir(), THUMBNAIL_CACHE_FILE)
+        self.max_bytes = max_bytes
+
+    def connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("CREATE TABLE IF NOT EXISTS thumbnails ("
+                           "volume TEXT NOT NULL, rel_path TEXT NOT NULL, size INTEGER NOT NULL, "
+                           "mtime REAL NOT NULL, image BLOB, bytes INTEGER NOT NULL, last_used INTEGER NOT NULL, "
+                           "PRIMARY KEY (volume, rel_path))")
+        connection.execute("CREATE INDEX IF NOT EXISTS thumbnails_last_used ON thumbnails (last_used)")
+        return connection
+
+    # {ścieżka: PNG lub None} dla plików z aktualnym wpisem
+    def lookup(self, entries, root):
+        volume, rel_paths = MetadataCache.keys_for(entries, root)
+        now = int(time.time())
+        found = {}
+        connection = self.connect()
+        try:
+            with connection:
+                for entry, rel_path in zip(entries, rel_paths):
+                    row = connection.execute("SELECT size, mtime, image FROM thumbnails WHERE volume = ? AND "
+                                             "rel_path = ?", (volume, rel_path)).fetchone()
+                    if row and row[0] == entry.size and row[1] == entry.mtime:
+                        found[entry.path] = row[2]
+                        connection.execute("UPDATE thumbnails SET last_used = ? WHERE volume = ? AND rel_path = ?",
+                                           (now, volume, rel_path))
+        finally:
+            connection.close()
+        return found
+
+    def store(self, items, root):
+        if not items:
+            return
+        volume, rel_paths = MetadataCache.keys_for([entry for entry, _ in items], root)
+        now = int(time.time())
+        connection = self.connect()
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO thumbnails (volume, rel_path, size, mtime, image, bytes, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(volume, rel_path, entry.size, entry.mtime, image, len(image or b""), now)
+                     for (entry, image), rel_path in zip(items, rel_paths)])
+                total = connection.execute("SELECT COALESCE(SUM(bytes), 0) FROM thumbnails").fetchone()[0]
+                if total > self.max_bytes:
+                    # Usuwanie najdawniej oglądanych miniatur do 90% limitu
+                    excess = total - self.max_bytes * 9 // 10
+                    removed = []
+                    for rowid, size in connection.execute("SELECT rowid, bytes FROM thumbnails ORDER BY last_used"):
+                        if excess <= 0:
+                            break
+                        removed.append((rowid,))
+                        excess -= max(size, 1)
+                    connection.executemany("DELETE FROM thumbnails WHERE rowid = ?", removed)
+        finally:
+            connection.close()
+
+
+# Ładowanie miniatur w wątkach w tle - tylko dla plików, które są właśnie widoczne w podglądzie.
+# Gotowe miniatury (ścieżka, PNG lub None) trafiają do kolejki results.
+class ThumbnailLoader:
+    def __init__(self, root, cache=None, workers=THUMBNAIL_WORKERS):
+        import concurrent.futures
+        self.root = root
+        self.cache = cache or ThumbnailCache()
+        self.results = queue.Queue()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+        self.requested = set()
+        self.wanted = set()
+        self.pending = []
+
+    # Wywoływane przy każdym przewinięciu; pliki, które zniknęły z widoku, nie są już ładowane
+    def request(self, entries):
+        with self.lock:
+            self.wanted = {entry.path for entry in entries}
+            new_entries = [entry for entry in entries if entry.path not in self.requested]
+            self.requested.update(entry.path for entry in new_entries)
+        if new_entries:
+            self.executor.submit(self.load_batch, new_entries)
+
+    # Miniatura usunięta z pamięci okna - przy ponownym pokazaniu trzeba ją wczytać jeszcze raz
+    def forget(self, path):
+        with self.lock:
+            self.requested.discard(path)
+
+    def load_batch(self, entries):
+        try:
+            cached = self.cache.lookup(entries, self.root)
+        except (sqlite3.Error, OSError):
+            cached = {}
+        for entry in entries:
+            if entry.path in cached:
+                self.results.put((entry.path, cached[entry.path]))
+            else:
+                self.executor.submit(self.load_one, entry)
+
+    def load_one(self, entry):
+        with self.lock:
+            if entry.path not in self.wanted:
+                self.requested.discard(entry.path)
+                return
+        image = make_thumbnail(entry.path, entry.size)
+        self.results.put((entry.path, image))
+        with self.lock:
+            self.pending.append((entry, image))
+            batch = self.pending if len(self.pending) >= THUMBNAIL_STORE_BATCH else None
+            if batch:
+                self.pending = []
+        if batch:
+            self.store(batch)
+
+    def store(self, items):
+        try:
+            self.cache.store(items, self.root)
+        except (sqlite3.Error, OSError):
+            pass
+
+    def close(self):
+        with self.lock:
+            self.wanted = set()
+            items, self.pending = self.pending, []
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.store(items)
+
+
+PARTIAL_HASH_BLOCK = 64 * 1024
+PARTIAL_HASH_SIZE = 16  # bajty skrótu; w manifeście skróty leżą w buforze o stałej szerokości wiersza
+
+
+# Szybki skrót pliku - rozmiar, początek i koniec pliku; bez czytania całej zawartości
+def compute_partial_hash(path, size):
+    digest = hashlib.blake2b(str(size).encode("ascii"), digest_size=PARTIAL_HASH_SIZE)
+    with open(path, "rb") as file:
+        digest.update(file.read(PARTIAL_HASH_BLOCK))
+        if size > 2 * PARTIAL_HASH_BLOCK:
+            file.seek(-PARTIAL_HASH_BLOCK, os.SEEK_END)
+            digest.update(file.read(PARTIAL_HASH_BLOCK))
+        elif size > PARTIAL_HASH_BLOCK:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def get_partial_hash(entry):
+    if entry.partial_hash is None:
+        entry.partial_hash = compute_partial_hash(entry.path, entry.size)
+    return entry.partial_hash
+
+
+def compute_full_hash(path, buffer_size=1024 * 1024):
+    digest = hashlib.blake2b()
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as file:
+        while True:
+            read = file.readinto(view)
+            if not read:
+                return digest.hexdigest()
+            digest.update(view[:read])
+
+
+# Postępowanie z plikami, których zawartość jest już w archiwum
+DUPLICATES_COPY = "Kopiuj zawsze"
+DUPLICATES_SKIP = "Pomiń"
+DUPLICATES_HARDLINK = "Twarde dowiązanie"
+DUPLICATES_REFLINK = "Reflink"
+DUPLICATE_MODES = [DUPLICATES_COPY, DUPLICATES_SKIP, DUPLICATES_HARDLINK, DUPLICATES_REFLINK]
+
+ARCHIVE_INDEX_FILE = ".importer-archive.sqlite"
+DEDUP_FLUSH_INTERVAL = 100
+
+
+# Indeks zawartości całego katalogu docelowego: rozmiar -> skrót częściowy -> pełny skrót.
+# Skróty plików archiwum liczone są dopiero wtedy, gdy pojawi się kandydat o tym samym rozmiarze.
+# Wiersze zostają w SQLite i są pobierane tylko dla rozmiaru sprawdzanego pliku - pamięć nie zależy od
+# wielkości archiwum; w pamięci czekają jedynie zmiany z ostatnich DEDUP_FLUSH_INTERVAL plików.
+class DedupIndex:
+    def __init__(self, archive_root):
+        self.archive_root = archive_root
+        self.path = os.path.join(archive_root, ARCHIVE_INDEX_FILE)
+        self.connection = None
+        self.dirty = {}
+        self.removed = set()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("CREATE TABLE IF NOT EXISTS files ("
+                           "rel_path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL, "
+                           "partial_hash TEXT, full_hash TEXT)")
+        connection.execute("CREATE INDEX IF NOT EXISTS files_size ON files (size)")
+        connection.execute("CREATE TABLE IF NOT EXISTS files_meta (key TEXT PRIMARY KEY, value TEXT)")
+        return connection
+
+    # Jedno połączenie na cały import - zapytanie o każdy sprawdzany rozmiar
+    def open(self):
+        if self.connection is None:
+            self.connection = self.connect()
+        return self.connection
+
+    # Indeks uzupełnia każdy import (także bez wyszukiwania duplikatów), a nieaktualne wpisy są wykreślane
+    # przy wyszukiwaniu. Drzewo archiwum przeglądane jest tylko raz - gdy indeks nie był jeszcze zbudowany;
+    # pliki skopiowane do archiwum ręcznie dopisuje `gen.py catalog rebuild`.
+    def load(self):
+        if self.open().execute("SELECT value FROM files_meta WHERE key = 'rebuilt'").fetchone() is None:
+            self.rebuild()
+
+    # Uzgodnienie indeksu z drzewem archiwum (same metadane, bez czytania plików) w całości w SQLite:
+    # nowe ścieżki są dopisywane, usunięte - wykreślane, zmienione tracą zapamiętane skróty
+    def rebuild(self, manifest=None):
+        if manifest is None:
+            manifest = scan_media(self.archive_root)
+        rows = ((os.path.relpath(entry.path, self.archive_root), entry.size, entry.mtime)
+                for entry in manifest.entries
+                # Pliki robocze programu (indeks, dziennik importu, niedokończone kopie)
+                if not entry.name.startswith(".importer-") and not entry.name.endswith(PART_SUFFIX))
+        connection = self.open()
+        with connection:
+            connection.execute("CREATE TEMP TABLE IF NOT EXISTS scanned ("
+                               "rel_path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL)")
+            connection.execute("DELETE FROM scanned")
+            connection.executemany("INSERT OR REPLACE INTO scanned (rel_path, size, mtime) VALUES (?, ?, ?)", rows)
+            connection.execute("DELETE FROM files WHERE rel_path NOT IN (SELECT rel_path FROM scanned)")
+            connection.execute("INSERT OR REPLACE INTO files (rel_path, size, mtime, partial_hash, full_hash) "
+                               "SELECT s.rel_path, s.size, s.mtime, NULL, NULL FROM scanned s "
+                               "LEFT JOIN files f ON f.rel_path = s.rel_path "
+                               "WHERE f.rel_path IS NULL OR f.size != s.size OR f.mtime != s.mtime")
+            connection.execute("DELETE FROM scanned")
+            connection.execute("INSERT OR REPLACE INTO files_meta (key, value) VALUES ('rebuilt', ?)",
+                               (datetime.datetime.now().isoformat(timespec="seconds"),))
+
+    # Pliki archiwum o danym rozmiarze: wiersze z bazy uzupełnione zmianami, które nie zostały jeszcze zapisane
+    def candidates(self, size):
+        rows = {row[0]: list(row) for row in self.open().execute(
+            "SELECT rel_path, size, mtime, partial_hash, full_hash FROM files WHERE size = ?", (size,))}
+        rows.update((rel_path, row) for rel_path, row in self.dirty.items() if row[1] == size)
+        return [row for rel_path, row in rows.items() if rel_path not in self.removed]
+
+    def find_duplicate(self, entry):
+        candidates = self.candidates(entry.size)
+        if not candidates:
+            return None
+        partial_hash = get_partial_hash(entry)
+        full_hash = None
+        for row in candidates:
+            path = os.path.join(self.archive_root, row[0])
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            # Plik usunięty lub zmieniony poza programem - wpis jest nieaktualny
+            if stat is None or stat.st_size != row[1] or stat.st_mtime != row[2]:
+                self.dirty.pop(row[0], None)
+                self.removed.add(row[0])
+                continue
+            if row[3] is None:
+                row[3] = compute_partial_hash(path, row[1])
+                self.dirty[row[0]] = row
+            if row[3] != partial_hash:
+                continue
+            if full_hash is None:
+                full_hash = compute_full_hash(entry.path)
+            if row[4] is None:
+                row[4] = compute_full_hash(path)
+                self.dirty[row[0]] = row
+            if row[4] == full_hash:
+                return path
+        return None
+
+    def add(self, dest_file, entry, full_hash=None):
+        rel_path = os.path.relpath(dest_file, self.archive_root)
+        stat = os.stat(dest_file)
+        self.dirty[rel_path] = [rel_path, stat.st_size, stat.st_mtime, entry.partial_hash, full_hash]
+        self.removed.discard(rel_path)
+        if len(self.dirty) >= DEDUP_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if not self.dirty and not self.removed:
+            return
+        connection = self.open()
+        with connection:
+            connection.executemany("DELETE FROM files WHERE rel_path = ?", [(path,) for path in self.removed])
+            connection.executemany("INSERT OR REPLACE INTO files (rel_path, size, mtime, partial_hash, full_hash) "
+                                   "VALUES (?, ?, ?, ?, ?)", list(self.dirty.values()))
+        self.dirty = {}
+        self.removed = set()
+
+    def save(self):
+        try:
+            self.flush()
+        finally:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    # Katalog importu przemianowany (sufiks P/M/PM) - ścieżki w indeksie muszą za nim podążyć
+    def rename_folder(self, old_folder, new_folder):
+        connection = self.connect()
+        try:
+            with connection:
+                rename_path_prefix(connection, "files", "rel_path", os.path.relpath(old_folder, self.archive_root),
+                                   os.path.relpath(new_folder, self.archive_root))
+        finally:
+            connection.close()
+
+
+# Zamiana początku ścieżek w kolumnie tabeli; porównanie przez substr, bo "_" w LIKE to symbol wieloznaczny
+def rename_path_prefix(connection, table, column, old_prefix, new_prefix):
+    old_prefix = os.path.join(old_prefix, "")
+    new_prefix = os.path.join(new_prefix, "")
+    connection.execute(f"UPDATE {table} SET {column} = ? || substr({column}, ?) WHERE substr({column}, 1, ?) = ?",
+                       (new_prefix, len(old_prefix) + 1, len(old_prefix), old_prefix))
+
+
+# Nazwa katalogu importu: data lub zakres dat, skrót źródła i opcjonalny sufiks P/M/PM
+IMPORT_FOLDER_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:_do_(\d{4}-\d{2}-\d{2}))?_(.+?)(?:_(?:PM|P|M))?$")
+DAY_FOLDER_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+# Katalog całego archiwum: data, źródło, rozmiar, skróty i ścieżka każdego zaimportowanego pliku.
+# Wpisy dopisywane są przy każdym imporcie; zapytania po zakresie dat lub źródle nie przeglądają drzewa katalogów.
+class ArchiveCatalog:
+    def __init__(self, archive_root):
+        self.archive_root = archive_root
+        self.path = os.path.join(archive_root, ARCHIVE_INDEX_FILE)
+        self.pending = []
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("CREATE TABLE IF NOT EXISTS catalog ("
+                           "rel_path TEXT PRIMARY KEY, date TEXT NOT NULL, source TEXT NOT NULL, "
+                           "size INTEGER NOT NULL, partial_hash TEXT, full_hash TEXT, imported_at INTEGER NOT NULL)")
+        connection.execute("CREATE INDEX IF NOT EXISTS catalog_date ON catalog (date)")
+        connection.execute("CREATE INDEX IF NOT EXISTS catalog_source ON catalog (source, date)")
+        return connection
+
+    def add(self, dest_file, entry, source, full_hash=None):
+        self.pending.append((os.path.relpath(dest_file, self.archive_root), entry.date.isoformat(), source,
+                             entry.size, entry.partial_hash, full_hash, int(time.time())))
+
+    def flush(self):
+        if not self.pending:
+            return
+        connection = self.connect()
+        try:
+            with connection:
+                connection.executemany("INSERT OR REPLACE INTO catalog (rel_path, date, source, size, partial_hash, "
+                                       "full_hash, imported_at) VALUES (?, ?, ?, ?, ?, ?, ?)", self.pending)
+        finally:
+            connection.close()
+        self.pending = []
+
+    def rename_folder(self, old_folder, new_folder):
+        connection = self.connect()
+        try:
+            with connection:
+                rename_path_prefix(connection, "catalog", "rel_path", os.path.relpath(old_folder, self.archive_root),
+                                   os.path.relpath(new_folder, self.archive_root))
+        finally:
+            connection.close()
+
+    # Daty w formacie RRRR-MM-DD (włącznie), source - skrót źródła
+    def query(self, date_from=None, date_to=None, source=None):
+        conditions = []
+        parameters = []
+        if date_from:
+            conditions.append("date >= ?")
+            parameters.append(date_from)
+        if date_to:
+            conditions.append("date <= ?")
+            parameters.append(date_to)
+        if source:
+            conditions.append("source = ?")
+            parameters.append(source)
+        sql = "SELECT rel_path, date, source, size, partial_hash, full_hash FROM catalog"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        connection = self.connect()
+        try:
+            return connection.execute(sql + " ORDER BY date, rel_path", parameters).fetchall()
+        finally:
+            connection.close()
+
+    # Odbudowa z istniejącego drzewa (archiwa sprzed katalogu). Data z katalogu dnia lub nazwy katalogu importu,
+    # a gdy jej tam nie ma - z nagłówków pliku; źródło ze skrótu w nazwie katalogu importu.
+    def rebuild(self, hashes=False, progress=None, manifest=None):
+        if manifest is None:
+            manifest = scan_media(self.archive_root, progress=progress)
+        entries = [entry for entry in manifest.entries
+                   if not entry.name.startswith(".importer-") and not entry.name.endswith(PART_SUFFIX)]
+        sources = {}
+        undated = []
+        for entry in entries:
+            parts = os.path.relpath(entry.path, self.archive_root).split(os.sep)
+            match = IMPORT_FOLDER_PATTERN.match(parts[0]) if len(parts) > 1 else None
+            sources[entry.path] = match.group(3) if match else ""
+            if len(parts) > 2 and DAY_FOLDER_PATTERN.match(parts[-2]):
+                entry.date = datetime.datetime.strptime(parts[-2], "%Y-%m-%d").date()
+            elif match and not match.group(2):
+                entry.date = datetime.datetime.strptime(match.group(1), "%Y-%m-%d").date()
+            else:
+                undated.append(entry)
+        if undated:
+            manifest.resolve_dates(cache=MetadataCache(), entries=undated)
+        for entry in entries:
+            if hashes:
+                get_partial_hash(entry)
+            self.add(entry.path, entry, sources[entry.path])
+        connection = self.connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM catalog")
+        finally:
+            connection.close()
+        self.flush()
+        return len(entries)
+
+
+IMPORT_INDEX_FILE = "import_index.sqlite"
+
+
+# Indeks już zaimportowanych plików dla każdego źródła z source.txt (import przyrostowy)
+class ImportIndex:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_config_dir(), IMPORT_INDEX_FILE)
+        self.pending = []
+
+    def connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        connection.execute("CREATE TABLE IF NOT EXISTS imported ("
+                           "source TEXT NOT NULL, size INTEGER NOT NULL, date TEXT NOT NULL, "
+                           "partial_hash TEXT NOT NULL, dest_path TEXT NOT NULL, imported_at INTEGER NOT NULL, "
+                           "PRIMARY KEY (source, size, date, partial_hash))")
+        return connection
+
+    # Podział plików na nowe i już zaimportowane. Skrót liczony jest tylko dla plików,
+    # których rozmiar i data pasują do wpisu w indeksie.
+    def partition(self, source, entries):
+        connection = self.connect()
+        try:
+            known = {}
+            for size, date, partial_hash, dest_path in connection.execute(
+                    "SELECT size, date, partial_hash, dest_path FROM imported WHERE source = ?", (source,)):
+                known.setdefault((size, date), {})[partial_hash] = dest_path
+        finally:
+            connection.close()
+
+        new_entries = []
+        skipped_entries = []
+        for entry in entries:
+            candidates = known.get((entry.size, entry.date.isoformat() if entry.date else None))
+            if candidates:
+                dest_path = candidates.get(get_partial_hash(entry))
+                # Plik usunięty z archiwum trzeba zaimportować ponownie
+                if dest_path and os.path.exists(dest_path):
+                    skipped_entries.append(entry)
+                    continue
+            new_entries.append(entry)
+        return new_entries, skipped_entries
+
+    def record(self, source, entry, dest_path, partial_hash):
+        # Indeks jest wspólny dla wszystkich uruchomień - ścieżka względna zależałaby od katalogu bieżącego
+        self.pending.append((source, entry.size, entry.date.isoformat(), partial_hash, os.path.abspath(dest_path),
+                             int(time.time())))
+
+    def flush(self):
+        if not self.pending:
+            return
+        connection = self.connect()
+        try:
+            with connection:
+                connection.executemany("INSERT OR REPLACE INTO imported (source, size, date, partial_hash, dest_path, "
+                                       "imported_at) VALUES (?, ?, ?, ?, ?, ?)", self.pending)
+        finally:
+            connection.close()
+        self.pending = []
+
+    def rename_folder(self, old_folder, new_folder):
+        connection = self.connect()
+        try:
+            with connection:
+                rename_path_prefix(connection, "imported", "dest_path", old_folder, new_folder)
+        finally:
+            connection.close()
+
+
+# Źródła daty - te same etykiety, które pokazuje formularz
+DATE_ORIGIN_EXIF = "EXIF"
+DATE_ORIGIN_FILENAME = "Nazwa pliku"
+DATE_ORIGIN_CREATION = "Właściwości pliku"
+
+DATE_ORIGINS = (None, DATE_ORIGIN_EXIF, DATE_ORIGIN_FILENAME, DATE_ORIGIN_CREATION)
+
+_NOT_READ = object()
+EXIF_NOT_READ = -1  # w kolumnie dat EXIF: -1 - nie odczytano, 0 - brak daty, inaczej date.toordinal()
+
+
+# Pojedynczy plik z karty - widok na wiersz kolumn manifestu; nie przechowuje własnych danych
+class FileEntry:
+    __slots__ = ("manifest", "index")
+
+    def __init__(self, manifest, index):
+        self.manifest = manifest
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, FileEntry) and other.manifest is self.manifest and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.manifest), self.index))
+
+    @property
+    def path(self):
+        return os.path.join(self.manifest.dirs[self.manifest.dir_ids[self.index]], self.name)
+
+    @property
+    def name(self):
+        return self.manifest.name_at(self.index)
+
+    @property
+    def size(self):
+        return self.manifest.sizes[self.index]
+
+    @property
+    def mtime(self):
+        return self.manifest.mtimes[self.index]
+
+    @property
+    def ctime(self):
+        return self.manifest.ctimes[self.index]
+
+    @property
+    def ext(self):
+        return self.manifest.extensions[self.manifest.ext_ids[self.index]]
+
+    @property
+    def exif_date(self):
+        ordinal = self.manifest.exif_ordinals[self.index]
+        if ordinal == EXIF_NOT_READ:
+            return _NOT_READ
+        return datetime.date.fromordinal(ordinal) if ordinal else None
+
+    @exif_date.setter
+    def exif_date(self, value):
+        self.manifest.exif_ordinals[self.index] = value.toordinal() if value else 0
+
+    @property
+    def date(self):
+        ordinal = self.manifest.date_ordinals[self.index]
+        return datetime.date.fromordinal(ordinal) if ordinal else None
+
+    @date.setter
+    def date(self, value):
+        self.manifest.date_ordinals[self.index] = value.toordinal() if value else 0
+
+    @property
+    def date_origin(self):
+        return DATE_ORIGINS[self.manifest.origins[self.index]]
+
+    @date_origin.setter
+    def date_origin(self, value):
+        self.manifest.origins[self.index] = DATE_ORIGINS.index(value)
+
+    @property
+    def partial_hash(self):
+        if not self.manifest.hashed[self.index]:
+            return None
+        offset = self.index * PARTIAL_HASH_SIZE
+        return self.manifest.partial_hashes[offset:offset + PARTIAL_HASH_SIZE].hex()
+
+    @partial_hash.setter
+    def partial_hash(self, value):
+        offset = self.index * PARTIAL_HASH_SIZE
+        self.manifest.partial_hashes[offset:offset + PARTIAL_HASH_SIZE] = bytes.fromhex(value)
+        self.manifest.hashed[self.index] = 1
+
+
+# Manifest karty - pliki ze skanowania, współdzielone przez analizę, kopiowanie i podsumowanie.
+# Dane trzymane są kolumnami (array, bytearray) zamiast obiektu na plik: katalogi raz w tabeli katalogów,
+# nazwy w jednym buforze UTF-8 z przesunięciami, daty jako liczby dni (date.toordinal(), 0 - brak daty).
+class ScanManifest:
+    def __init__(self, root):
+        self.root = root
+        self.dirs = []
+        self.dir_index = {}
+        self.dir_ids = array.array("I")
+        self.names = bytearray()
+        self.name_offsets = array.array("Q", [0])
+        self.extensions = []
+        self.extension_index = {}
+        self.ext_ids = array.array("H")
+        self.sizes = array.array("q")
+        self.mtimes = array.array("d")
+        self.ctimes = array.array("d")
+        self.exif_ordinals = array.array("i")
+        self.date_ordinals = array.array("i")
+        self.origins = array.array("b")
+        self.partial_hashes = bytearray()
+        self.hashed = bytearray()
+        self.total_size = 0
+        self.resolved_with_exif = None
+
+    def add(self, directory, name, size, mtime, ctime):
+        dir_id = self.dir_index.get(directory)
+        if dir_id is None:
+            dir_id = self.dir_index[directory] = len(self.dirs)
+            self.dirs.append(directory)
+        ext = os.path.splitext(name)[1].lower()
+        ext_id = self.extension_index.get(ext)
+        if ext_id is None:
+            ext_id = self.extension_index[ext] = len(self.extensions)
+            self.extensions.append(ext)
+        self.dir_ids.append(dir_id)
+        # surrogatepass - nazwy z niedekodowalnymi bajtami (surrogateescape) wracają bez zmian
+        self.names += name.encode("utf-8", "surrogatepass")
+        self.name_offsets.append(len(self.names))
+        self.ext_ids.append(ext_id)
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+        self.ctimes.append(ctime)
+        self.exif_ordinals.append(EXIF_NOT_READ)
+        self.date_ordinals.append(0)
+        self.origins.append(0)
+        self.partial_hashes += bytes(PARTIAL_HASH_SIZE)
+        self.hashed.append(0)
+        self.total_size += size
+        return len(self.sizes) - 1
+
+    def name_at(self, index):
+        return self.names[self.name_offsets[index]:self.name_offsets[index + 1]].decode("utf-8", "surrogatepass")
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [FileEntry(self, position) for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return FileEntry(self, index)
+
+    def __iter__(self):
+        return (FileEntry(self, index) for index in range(len(self)))
+
+    # Widoki plików tworzone przy odczycie - manifest sam jest sekwencją plików
+    @property
+    def entries(self):
+        return self
+
+    # entries - tylko część plików manifestu (np. odbudowa katalogu archiwum); wtedy manifest nie jest oznaczany
+    # jako przeanalizowany
+    def resolve_dates(self, use_exif=True, workers=None, cache=None, stats=None, entries=None):
+        if entries is None and self.resolved_with_exif == use_exif:
+            return
+        stats = stats or NullInstrumentation()
+        indexes = range(len(self)) if entries is None else [entry.index for entry in entries]
+        if use_exif:
+            self.read_exif_dates(workers, cache, stats, indexes)
+        exif_ordinals = self.exif_ordinals
+        # Daty z nazw dla wszystkich plików bez daty EXIF - jedna paczka zamiast wywołania na plik
+        pending = [index for index in indexes if not (use_exif and exif_ordinals[index] > 0)]
+        with stats.measure("get_date_from_filename", count=len(pending)):
+            filename_dates = iter(FilenameDateResolver().resolve_batch([self.name_at(index) for index in pending]))
+        exif_origin = DATE_ORIGINS.index(DATE_ORIGIN_EXIF)
+        filename_origin = DATE_ORIGINS.index(DATE_ORIGIN_FILENAME)
+        creation_origin = DATE_ORIGINS.index(DATE_ORIGIN_CREATION)
+        undated = []
+        for index in indexes:
+            if use_exif and exif_ordinals[index] > 0:
+                self.date_ordinals[index] = exif_ordinals[index]
+                self.origins[index] = exif_origin
+                continue
+            date_taken = next(filename_dates)
+            if date_taken:
+                self.date_ordinals[index] = date_taken.toordinal()
+                self.origins[index] = filename_origin
+            else:
+                undated.append(index)
+        with stats.measure("get_creation_date", count=len(undated)):
+            for index in undated:
+                date_taken = get_creation_date_from_stat(self.ctimes[index])
+                self.date_ordinals[index] = date_taken.toordinal() if date_taken else 0
+                self.origins[index] = creation_origin if date_taken else 0
+        if entries is None:
+            self.resolved_with_exif = use_exif
+
+    def read_exif_dates(self, workers=None, cache=None, stats=None, indexes=None):
+        stats = stats or NullInstrumentation()
+        if indexes is None:
+            indexes = range(len(self))
+        pending = [FileEntry(self, index) for index in indexes if self.exif_ordinals[index] == EXIF_NOT_READ]
+        if not pending:
+            return
+        if cache is not None:
+            try:
+                with stats.measure("metadata_cache", count=len(pending)):
+                    cache.lookup(pending, self.root)
+            except (sqlite3.Error, OSError, ValueError):
+                cache = None
+            pending = [entry for entry in pending if entry.exif_date is _NOT_READ]
+            if not pending:
+                return
+        workers = workers or DEFAULT_DATE_WORKERS
+        if workers > 1 and len(pending) >= PARALLEL_EXIF_MIN_FILES:
+            import concurrent.futures
+            from concurrent.futures.process import BrokenProcessPool
+            batch_size = max(1, min(EXIF_BATCH_SIZE, len(pending) // (workers * 4)))
+            batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+            try:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = {pool.submit(read_exif_dates, [entry.path for entry in batch]): batch
+                               for batch in batches}
+                    # Wyniki trafiają do manifestu w kolejności ukończenia paczek
+                    for future in concurrent.futures.as_completed(futures):
+                        for entry, (date_taken, seconds) in zip(futures[future], future.result()):
+                            entry.exif_date = date_taken
+                            stats.add("get_exif_date_taken", seconds, entry.path)
+            except (OSError, BrokenProcessPool):
+                # Pula niedostępna (np. ograniczone środowisko) - dokończ odczyt szeregowo
+                pass
+        for entry in pending:
+            if entry.exif_date is _NOT_READ:
+                entry.exif_date = stats.call("get_exif_date_taken", get_exif_date_taken, entry.path,
+                                             path=entry.path)
+        if cache is not None:
+            try:
+                cache.store(pending, self.root)
+            except (sqlite3.Error, OSError):
+                pass
+
+    def column(self, values, entries=None):
+        return values if entries is None else [values[entry.index] for entry in entries]
+
+    # Agregaty liczone wprost na kolumnach - bez tworzenia obiektów date dla każdego pliku
+    def date_range(self, entries=None):
+        ordinals = self.column(self.date_ordinals, entries)
+        if not max(ordinals, default=0):
+            return None, None
+        return datetime.date.fromordinal(min(filter(None, ordinals))), datetime.date.fromordinal(max(ordinals))
+
+    def unique_dates(self):
+        return {datetime.date.fromordinal(ordinal) for ordinal in set(self.date_ordinals) if ordinal}
+
+    def origin_counts(self):
+        return {origin: self.origins.count(code) for code, origin in enumerate(DATE_ORIGINS) if origin}
+
+
+# Jednokrotne przejście po katalogu - os.scandir i jeden stat na plik
+SCAN_PROGRESS_INTERVAL = 0.1  # co ile sekund skan raportuje liczbę i rozmiar znalezionych plików
+
+
+# progress(liczba plików, rozmiar) wywoływany w trakcie skanu; ustawione cancel_event przerywa skan
+def scan_media(root_path, progress=None, cancel_event=None):
+    manifest = ScanManifest(root_path)
+    reported = time.monotonic()
+    pending = [root_path]
+    while pending:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        if progress is not None and time.monotonic() - reported >= SCAN_PROGRESS_INTERVAL:
+            progress(len(manifest), manifest.total_size)
+            reported = time.monotonic()
+        current = pending.pop()
+        subdirs = []
+        try:
+            with os.scandir(current) as iterator:
+                for dir_entry in iterator:
+                    try:
+                        if dir_entry.is_dir(follow_symlinks=False):
+                            subdirs.append(dir_entry.path)
+                        elif dir_entry.is_file() and dir_entry.name != CARD_MARKER_FILE:
+                            stat = dir_entry.stat()
+                            manifest.add(current, dir_entry.name, stat.st_size, stat.st_mtime, stat.st_ctime)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        # Odwrócona kolejność, żeby podkatalogi były przetwarzane w kolejności odczytu (jak os.walk)
+        pending.extend(reversed(subdirs))
+    return manifest
+
+
+# Rozmiary bufora z sekcji "Rozmiar bufora"
+BUFFER_SIZES = {
+    "Mały (128 KB)": 128 * 1024,
+    "Średni (512 KB)": 512 * 1024,
+    "Duży (1 MB)": 1024 * 1024,
+}
+DYNAMIC_MIN_BUFFER = 128 * 1024
+DYNAMIC_MAX_BUFFER = 16 * 1024 * 1024
+DYNAMIC_INITIAL_MAX_BUFFER = 4 * 1024 * 1024
+DYNAMIC_TARGET_SECONDS = 0.25  # ile czasu ma trwać przesłanie jednego bloku
+THROUGHPUT_MIN_SAMPLE = 1024 * 1024  # mniejsze pliki nie mówią nic o przepustowości
+
+
+FICLONE = 0x40049409  # ioctl z linux/fs.h
+
+PIPELINE_MEMORY_LIMIT = 64 * 1024 * 1024  # łączny rozmiar puli buforów potoku
+PIPELINE_DYNAMIC_BUFFER = 1024 * 1024
+PIPELINE_MIN_BUFFERS = 4
+
+
+def get_device_key(path):
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return get_mount_point(path)
+
+
+# Wątek czytający kolejne pliki z karty do stałej puli buforów wielokrotnego użytku.
+# Czyta z wyprzedzeniem (również następne pliki), dopóki są wolne bufory - pamięć jest ograniczona
+# do rozmiaru puli, a karta pracuje w czasie, gdy dysk docelowy zapisuje poprzednie bloki.
+class PrefetchReader:
+    def __init__(self, paths, buffer_size, memory_limit=PIPELINE_MEMORY_LIMIT):
+        self.paths = paths
+        self.free = queue.Queue()
+        for _ in range(max(PIPELINE_MIN_BUFFERS, memory_limit // buffer_size)):
+            self.free.put(bytearray(buffer_size))
+        self.filled = queue.Queue()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.read_all, daemon=True)
+        self.thread.start()
+
+    def take_free_buffer(self):
+        while not self.stop_event.is_set():
+            try:
+                return self.free.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def read_all(self):
+        for index, path in enumerate(self.paths):
+            try:
+                with open(path, "rb", buffering=0) as file:
+                    while True:
+                        buffer = self.take_free_buffer()
+                        if buffer is None:
+                            return
+                        read = file.readinto(buffer)
+                        if not read:
+                            self.free.put(buffer)
+                            break
+                        self.filled.put((index, buffer, read))
+            except OSError as e:
+                self.filled.put((index, e, 0))
+                continue
+            # Koniec pliku
+            self.filled.put((index, None, 0))
+
+    # Bloki pliku o danym numerze; bloki plików pominiętych przez zapisującego są zwalniane po drodze
+    def chunks(self, index):
+        while True:
+            item_index, buffer, read = self.filled.get()
+            if item_index < index:
+                if isinstance(buffer, bytearray):
+                    self.free.put(buffer)
+                continue
+            if buffer is None:
+                return
+            if isinstance(buffer, Exception):
+                raise buffer
+            try:
+                yield memoryview(buffer)[:read]
+            finally:
+                self.free.put(buffer)
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join()
+
+
+class ChecksumMismatchError(OSError):
+    pass
+
+
+# Plik sum kontrolnych zgodny z "b2sum -c" - ścieżki względne wobec katalogu docelowego. Sumy dopisywane są
+# na bieżąco do pliku roboczego, więc lista skopiowanych plików nie jest trzymana w pamięci.
+CHECKSUM_STREAM_FILE = ".importer-checksums"
+CHECKSUM_FLUSH_INTERVAL = 100
+
+
+class ChecksumWriter:
+    def __init__(self, folder, flush_every=CHECKSUM_FLUSH_INTERVAL):
+        self.path = os.path.join(folder, CHECKSUM_STREAM_FILE)
+        self.flush_every = flush_every
+        self.lines = []
+        self.file = open(self.path, "a", encoding="utf-8", newline="\n")
+
+    def write(self, rel_path, checksum):
+        self.lines.append(f"{checksum}  {rel_path.replace(os.sep, '/')}\n")
+        if len(self.lines) >= self.flush_every:
+            self.flush()
+
+    # Pliki z zapisaną sumą (wznowienie importu); linia urwana przy awarii jest usuwana z pliku
+    def recorded_paths(self):
+        self.flush()
+        with open(self.path, "r", encoding="utf-8", newline="\n") as file:
+            lines = file.readlines()
+        if lines and not lines[-1].endswith("\n"):
+            lines.pop()
+            self.file.seek(0)
+            self.file.truncate(sum(len(line.encode("utf-8")) for line in lines))
+        return {os.path.normpath(line.rstrip("\n").split("  ", 1)[1]) for line in lines}
+
+    def flush(self):
+        if self.lines:
+            self.file.write("".join(self.lines))
+            self.lines.clear()
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    # Plik roboczy dostaje docelową nazwę po zakończeniu importu (także po dodaniu sufiksu do katalogu)
+    @staticmethod
+    def finish(dest_folder):
+        path = os.path.join(dest_folder, CHECKSUM_STREAM_FILE)
+        if not os.path.exists(path):
+            return None
+        if not os.path.getsize(path):
+            os.remove(path)
+            return None
+        checksum_file_path = os.path.join(dest_folder, f"{os.path.basename(dest_folder)}.b2sum")
+        os.replace(path, checksum_file_path)
+        return checksum_file_path
+
+
+# Trwały zapis wpisów katalogu (nowy plik, zmiana nazwy). W Windows katalogu nie da się otworzyć do fsync,
+# a NTFS zapisuje metadane w dzienniku systemu plików.
+def fsync_directory(path):
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# Silnik kopiowania plików blokami o rozmiarze z ustawień (lub dobieranym dynamicznie)
+class CopyEngine:
+    def __init__(self, buffer_mode):
+        self.buffer_mode = buffer_mode
+        self.fixed_size = BUFFER_SIZES.get(buffer_mode)
+        self.throughput = None
+        # Kopiowanie w jądrze (Linux) - wyłączane po pierwszym błędzie, np. na innym systemie plików
+        self.use_copy_file_range = hasattr(os, "copy_file_range")
+        self.use_sendfile = hasattr(os, "sendfile") and sys.platform.startswith("linux")
+        self.buffer = None
+        self.reader = None
+        self.reader_positions = {}
+
+    # Potok odczyt/zapis dla znanej z góry listy plików (np. karta -> inny dysk)
+    def start_pipeline(self, paths):
+        self.stop_pipeline()
+        self.reader = PrefetchReader(paths, self.fixed_size or PIPELINE_DYNAMIC_BUFFER)
+        self.reader_positions = {path: index for index, path in enumerate(paths)}
+
+    def stop_pipeline(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+            self.reader_positions = {}
+
+    def chunk_size(self, file_size):
+        if self.fixed_size:
+            return self.fixed_size
+        if self.throughput:
+            size = int(self.throughput * DYNAMIC_TARGET_SECONDS)
+        else:
+            size = min(file_size // 8, DYNAMIC_INITIAL_MAX_BUFFER)
+        # Nie ma sensu przydzielać bufora większego niż sam plik
+        size = min(size, file_size + 1)
+        size = max(DYNAMIC_MIN_BUFFER, min(size, DYNAMIC_MAX_BUFFER))
+        return (size + 65535) // 65536 * 65536
+
+    def record_throughput(self, copied, elapsed):
+        if copied < THROUGHPUT_MIN_SAMPLE or elapsed <= 0:
+            return
+        speed = copied / elapsed
+        if self.throughput is None:
+            self.throughput = speed
+        else:
+            self.throughput = 0.7 * self.throughput + 0.3 * speed
+
+    def copy(self, src, dst, file_size=None, digest=None):
+        if src in self.reader_positions:
+            return self.copy_from_pipeline(src, dst, digest)
+        started = time.monotonic()
+        with open(src, "rb", buffering=0) as fsrc, open(dst, "wb", buffering=0) as fdst:
+            if file_size is None:
+                file_size = os.fstat(fsrc.fileno()).st_size
+            chunk = self.chunk_size(file_size)
+            # Przy liczeniu sumy kontrolnej dane muszą przejść przez bufor programu
+            copied = self.copy_in_kernel(fsrc, fdst, chunk) if digest is None else 0
+            copied += self.copy_in_userspace(fsrc, fdst, chunk, digest)
+            # Dane na dysku, zanim plik dostanie docelową nazwę lub źródło zostanie usunięte
+            os.fsync(fdst.fileno())
+        # Czasy modyfikacji i uprawnienia jak w shutil.copy2
+        shutil.copystat(src, dst)
+        self.record_throughput(copied, time.monotonic() - started)
+        return copied
+
+    # Zapis bloków przeczytanych wcześniej przez wątek PrefetchReader
+    def copy_from_pipeline(self, src, dst, digest=None):
+        started = time.monotonic()
+        copied = 0
+        with open(dst, "wb", buffering=0) as fdst:
+            for view in self.reader.chunks(self.reader_positions[src]):
+                if digest is not None:
+                    digest.update(view)
+                written = 0
+                while written < len(view):
+                    written += fdst.write(view[written:])
+                copied += len(view)
+            os.fsync(fdst.fileno())
+        shutil.copystat(src, dst)
+        self.record_throughput(copied, time.monotonic() - started)
+        return copied
+
+    def move(self, src, dst, file_size=None):
+        try:
+            os.rename(src, dst)
+            return file_size if file_size is not None else os.path.getsize(dst)
+        except OSError:
+            pass
+        copied = self.copy(src, dst, file_size)
+        fsync_directory(os.path.dirname(dst))
+        os.remove(src)
+        return copied
+
+    # Kopiowanie z sumą kontrolną liczoną w locie i sprawdzeniem pliku docelowego
+    def copy_verified(self, src, dst, file_size=None):
+        source_digest = hashlib.blake2b()
+        copied = self.copy(src, dst, file_size, source_digest)
+        checksum = source_digest.hexdigest()
+        # Kopia jest już zsynchronizowana z dyskiem - strony usunięte z pamięci podręcznej są czytane ponownie
+        # z nośnika. Bez posix_fadvise (Windows) odczyt trafia w pamięć podręczną i sprawdza tylko ścieżkę zapisu.
+        if self.hash_file(dst, copied, drop_cache=True) != checksum:
+            raise ChecksumMismatchError(f"Suma kontrolna pliku {dst} nie zgadza się ze źródłem {src}")
+        return copied, checksum
+
+    # Źródło jest usuwane dopiero po potwierdzeniu zgodności sum kontrolnych
+    def move_verified(self, src, dst, file_size=None):
+        try:
+            os.rename(src, dst)
+            # Zmiana nazwy nie przenosi danych - suma jest potrzebna tylko do pliku .b2sum
+            copied = file_size if file_size is not None else os.path.getsize(dst)
+            return copied, self.hash_file(dst, copied)
+        except OSError:
+            pass
+        copied, checksum = self.copy_verified(src, dst, file_size)
+        fsync_directory(os.path.dirname(dst))
+        os.remove(src)
+        return copied, checksum
+
+    # Kopia współdzieląca bloki danych (btrfs, XFS) - bez przesyłania zawartości
+    @staticmethod
+    def clone(src, dst):
+        if fcntl is None:
+            raise OSError("Reflink nie jest obsługiwany w tym systemie")
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            os.fsync(fdst.fileno())
+        shutil.copystat(src, dst)
+
+    def hash_file(self, path, file_size, drop_cache=False):
+        digest = hashlib.blake2b()
+        chunk = self.chunk_size(file_size)
+        if self.buffer is None or len(self.buffer) != chunk:
+            self.buffer = bytearray(chunk)
+        view = memoryview(self.buffer)
+        with open(path, "rb", buffering=0) as file:
+            if drop_cache and hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+            while True:
+                read = file.readinto(view)
+                if not read:
+                    return digest.hexdigest()
+                digest.update(view[:read])
+
+    def copy_in_kernel(self, fsrc, fdst, chunk):
+        # Obie metody przesuwają pozycję w plikach, więc po błędzie kopiowanie w przestrzeni
+        # użytkownika kontynuuje od miejsca, w którym jądro skończyło
+        copied = 0
+        infd = fsrc.fileno()
+        outfd = fdst.fileno()
+        if self.use_copy_file_range:
+            try:
+                while True:
+                    sent = os.copy_file_range(infd, outfd, chunk)
+                    if sent == 0:
+                        return copied
+                    copied += sent
+            except OSError:
+                self.use_copy_file_range = False
+        if self.use_sendfile:
+            try:
+                while True:
+                    sent = os.sendfile(outfd, infd, None, chunk)
+                    if sent == 0:
+                        return copied
+                    copied += sent
+            except OSError:
+                self.use_sendfile = False
+        return copied
+
+    def copy_in_userspace(self, fsrc, fdst, chunk, digest=None):
+        # Jeden bufor wielokrotnego użytku zamiast nowego obiektu bytes na każdy blok
+        if self.buffer is None or len(self.buffer) != chunk:
+            self.buffer = bytearray(chunk)
+        view = memoryview(self.buffer)
+        copied = 0
+        while True:
+            read = fsrc.readinto(view)
+            if not read:
+                return copied
+            if digest is not None:
+                digest.update(view[:read])
+            written = 0
+            while written < read:
+                written += fdst.write(view[written:read])
+            copied += read
+
+
+# Nazwa głównego katalogu docelowego na podstawie zakresu dat i skrótu źródła
+def build_main_folder_name(naming, first_file_date, latest_file_date, source_name_short):
+    if naming == "Data i źródło":
+        return f"{first_file_date.strftime('%Y-%m-%d')}_{source_name_short}"
+    elif naming == "Zakres dat i źródło":
+        return f"{first_file_date.strftime('%Y-%m-%d')}_do_{latest_file_date.strftime('%Y-%m-%d')}_{source_name_short}"
+    return "backup"
+
+
+# Nazwa skrócona źródła, np. "Telefon Jarek (Tel_Jar)" -> "Tel_Jar"
+def get_short_name_from_source(source_entry):
+    match = re.search(r"\((.*?)\)", source_entry)
+    if match:
+        return match.group(1)
+    return ""
+
+
+SOURCES_FILE = "source.txt"
+
+
+def load_sources(path=SOURCES_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return [line.strip() for line in file.readlines()]
+    except FileNotFoundError:
+        return []
+
+
+def save_sources(sources, path=SOURCES_FILE):
+    with open(path, "w", encoding="utf-8") as file:
+        for source in sources:
+            file.write(source + "\n")
+
+
+CARD_MARKER_FILE = ".importer-source"  # plik na karcie z wpisem źródła z source.txt
+WATCH_INTERVAL = 2.0
+REMOVABLE_MOUNT_ROOTS = ("/media/", "/run/media/", "/mnt/", "/Volumes/")
+DRIVE_REMOVABLE = 2
+SEM_FAILCRITICALERRORS = 0x0001
+
+
+# Punkty montowania nośników wymiennych (karty, czytniki USB)
+def list_removable_mounts():
+    if os.name == 'nt':
+        try:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            mask = kernel32.GetLogicalDrives()
+        except (OSError, AttributeError):
+            return []
+        # Bez systemowego okna "Brak dysku w stacji" dla pustych gniazd czytnika
+        kernel32.SetErrorMode(SEM_FAILCRITICALERRORS)
+        drives = [f"{chr(ord('A') + bit)}:\\" for bit in range(26) if mask & (1 << bit)]
+        # Gniazdo czytnika ma literę dysku także bez karty - liczą się tylko nośniki z woluminem
+        return [drive for drive in drives if kernel32.GetDriveTypeW(drive) == DRIVE_REMOVABLE
+                and kernel32.GetVolumeInformationW(drive, None, 0, None, None, None, None, 0)]
+    if sys.platform == "darwin":
+        try:
+            return [os.path.join("/Volumes", name) for name in sorted(os.listdir("/Volumes"))
+                    if not os.path.islink(os.path.join("/Volumes", name))]
+        except OSError:
+            return []
+    mounts = []
+    try:
+        with open("/proc/self/mounts", "r", encoding="utf-8") as file:
+            for line in file:
+                fields = line.split()
+                if len(fields) < 2:
+                    continue
+                # Spacje i inne znaki specjalne zapisane w /proc/mounts jako \040 itd.
+                mount_point = re.sub(r"\\([0-7]{3})", lambda match: chr(int(match.group(1), 8)), fields[1])
+                if mount_point.startswith(REMOVABLE_MOUNT_ROOTS):
+                    mounts.append(mount_point)
+    except OSError:
+        pass
+    return mounts
+
+
+def get_volume_label(mount_point):
+    if os.name == 'nt':
+        try:
+            import ctypes
+            label = ctypes.create_unicode_buffer(261)
+            if ctypes.windll.kernel32.GetVolumeInformationW(mount_point, label, len(label), None, None, None,
+                                                            None, 0):
+                return label.value
+        except (OSError, AttributeError):
+            pass
+        return ""
+    # Linux i macOS montują nośnik w katalogu nazwanym etykietą woluminu
+    return os.path.basename(os.path.normpath(mount_point))
+
+
+def read_card_marker(mount_point):
+    try:
+        with open(os.path.join(mount_point, CARD_MARKER_FILE), "r", encoding="utf-8") as file:
+            return file.readline().strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def write_card_marker(mount_point, source_entry):
+    with open(os.path.join(mount_point, CARD_MARKER_FILE), "w", encoding="utf-8") as file:
+        file.write(source_entry + "\n")
+
+
+# Wpis z source.txt dla karty: najpierw plik znacznika, potem etykieta woluminu (pełna nazwa lub skrót)
+def identify_card(mount_point, sources):
+    marker = read_card_marker(mount_point)
+    label = get_volume_label(mount_point)
+    for value in (marker, label):
+        if not value:
+            continue
+        for source_entry in sources:
+            if value.lower() in (source_entry.lower(), get_short_name_from_source(source_entry).lower()):
+                return source_entry
+    return None
+
+
+# Obserwacja podłączanych kart. Na Linuksie zmiana /proc/self/mounts budzi wątek od razu (poll),
+# w pozostałych systemach lista nośników sprawdzana jest co WATCH_INTERVAL sekund.
+# report dostaje {"event": "card", "path": punkt montowania, "source": wpis z source.txt lub None}.
+class CardWatcher(threading.Thread):
+    def __init__(self, report, sources_path=SOURCES_FILE, interval=WATCH_INTERVAL):
+        super().__init__(daemon=True)
+        self.report = report
+        self.sources_path = sources_path
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def wait_for_change(self, mounts_file):
+        if mounts_file is None:
+            self.stop_event.wait(self.interval)
+            return
+        import select
+        poller = select.poll()
+        poller.register(mounts_file, select.POLLPRI | select.POLLERR)
+        if poller.poll(self.interval * 1000):
+            # Zdarzenie jest kasowane dopiero po ponownym odczycie pliku
+            mounts_file.seek(0)
+            mounts_file.read()
+
+    def run(self):
+        # Nośniki podłączone przed uruchomieniem obserwacji nie są zgłaszane
+        known = set(list_removable_mounts())
+        mounts_file = None
+        if sys.platform.startswith("linux"):
+            try:
+                mounts_file = open("/proc/self/mounts", "r", encoding="utf-8")
+            except OSError:
+                mounts_file = None
+        try:
+            while not self.stop_event.is_set():
+                self.wait_for_change(mounts_file)
+                if self.stop_event.is_set():
+                    return
+                current = set(list_removable_mounts())
+                for mount_point in sorted(current - known):
+                    self.report({"event": "card", "path": mount_point,
+                                 "source": identify_card(mount_point, load_sources(self.sources_path))})
+                known = current
+        finally:
+            if mounts_file is not None:
+                mounts_file.close()
+
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.raw'}
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi'}
+
+
+# Dopisanie P (zdjęcia), M (filmy) lub PM do nazwy katalogu na podstawie liczby zaimportowanych plików
+# każdego rozszerzenia (ImportResult.extension_counts)
+def add_suffix(dest_folder, extension_counts):
+    extensions = set(extension_counts)
+    image_found = not extensions.isdisjoint(IMAGE_EXTENSIONS)
+    video_found = not extensions.isdisjoint(VIDEO_EXTENSIONS)
+
+    new_folder_name = dest_folder
+
+    if image_found and video_found:
+        new_folder_name = f"{dest_folder}_PM"
+    elif image_found:
+        new_folder_name = f"{dest_folder}_P"
+    elif video_found:
+        new_folder_name = f"{dest_folder}_M"
+
+    if new_folder_name != dest_folder:
+        os.rename(dest_folder, new_folder_name)
+
+    return new_folder_name
+
+
+LOG_STREAM_FILE = "LOG-importu.jsonl"
+LOG_FLUSH_INTERVAL = 100
+
+
+# Log importu zapisywany na bieżąco w formacie JSON Lines (jeden plik w linii).
+# Wpisy czekają w buforze i trafiają do pliku co LOG_FLUSH_INTERVAL plików - awaria traci najwyżej ostatnią paczkę.
+class ImportLogWriter:
+    def __init__(self, folder, flush_every=LOG_FLUSH_INTERVAL):
+        self.path = os.path.join(folder, LOG_STREAM_FILE)
+        self.flush_every = flush_every
+        self.lines = []
+        # Dopisywanie - wznowiony import kontynuuje ten sam log
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def write(self, entry, dest_rel, duration, checksum=None):
+        self.lines.append(json.dumps({
+            "src": entry.path,
+            "dest": dest_rel,
+            "size": entry.size,
+            "date": entry.date.isoformat(),
+            "origin": entry.date_origin,
+            "duration": round(duration, 4),
+            "checksum": checksum,
+        }, ensure_ascii=False))
+        if len(self.lines) >= self.flush_every:
+            self.flush()
+
+    # Pliki zapisane już w logu (wznowienie importu po awarii)
+    def logged_destinations(self):
+        self.flush()
+        return {record["dest"] for record in read_log_stream(self.path)}
+
+    def flush(self):
+        if self.lines:
+            self.file.write("\n".join(self.lines) + "\n")
+            self.lines.clear()
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+def read_log_stream(path):
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Linia urwana przy awarii
+                continue
+
+
+# Tekstowy log tworzony z logu JSON Lines - lista plików jest czytana strumieniowo, nie trzymana w pamięci
+def write_log(log_stream_path, dest_folder, options, stats=None):
+    if not os.path.exists(dest_folder):
+        os.makedirs(dest_folder, exist_ok=True)
+
+    file_count = 0
+    total_size = 0
+    for record in read_log_stream(log_stream_path):
+        file_count += 1
+        total_size += record["size"]
+
+    log_file_name = f"LOG-kopiowania do katalogu {os.path.basename(dest_folder)}.txt"
+    log_file_path = os.path.join(dest_folder, log_file_name)
+
+    with open(log_file_path, "w", encoding="utf-8") as log_file:
+        log_file.write(f"Operacja: {options['operation']}\n")
+        log_file.write(f"Rozmiar bufora: {options['buffer']}\n")
+        log_file.write(f"Format nazwy folderu: {options['naming']}\n")
+        log_file.write(f"Dodaj sufiks: {options['suffix']}\n")
+        log_file.write(f"Twórz podkatalogi: {options['subfolder']}\n")
+        log_file.write(f"Weryfikacja sum kontrolnych: {options['verify']}\n\n")
+        log_file.write(f"Skopiowano plików: {file_count}\n")
+        log_file.write(f"Łączny rozmiar: {total_size / (1024 * 1024):.2f} MB\n\n")
+        if stats is not None:
+            log_file.write("\n".join(stats.format_lines()) + "\n\n")
+        log_file.write("Lista skopiowanych plików:\n")
+        for record in read_log_stream(log_stream_path):
+            log_file.write(f"{os.path.join(dest_folder, record['dest'])}\n")
+    return log_file_path
+
+
+# Statystyki w postaci JSON obok pliku logu
+def write_stats_file(dest_folder, stats):
+    stats_file_path = os.path.join(dest_folder, f"STATYSTYKI-{os.path.basename(dest_folder)}.json")
+    with open(stats_file_path, "w", encoding="utf-8") as stats_file:
+        json.dump(stats.to_dict(), stats_file, ensure_ascii=False, indent=2)
+    return stats_file_path
+
+
+SUBFOLDER_NONE = "Wszystkie pliki w jednym katalogu"
+SUBFOLDER_DAILY = "Twórz podkatalogi na każdy dzień"
+
+
+# Rozmieszczenie plików w katalogu docelowym - ścieżka względna dla każdego pliku, ustalona przed kopiowaniem.
+# Powtarzające się nazwy (np. DCIM/100GOPRO/GX010001.MP4 i DCIM/101GOPRO/GX010001.MP4) dostają nazwę
+# katalogu źródłowego, a w razie potrzeby kolejny numer. Nazwy rozdzielane są w kolejności ścieżek źródłowych,
+# więc ta sama karta zawsze daje ten sam plan. Porównanie bez wielkości liter (exFAT, NTFS).
+# Pliki leżące już w dest_folder (np. dogrywanie kolejnej karty do katalogu z tego samego dnia) też zajmują
+# swoje nazwy - każdy katalog docelowy jest listowany raz.
+def plan_layout(entries, subfolder=SUBFOLDER_DAILY, dest_folder=None):
+    dest_paths = [None] * len(entries)
+    taken = set()
+    listed = set()
+    for position in sorted(range(len(entries)), key=lambda position: entries[position].path):
+        entry = entries[position]
+        folder = entry.date.strftime("%Y-%m-%d") if subfolder == SUBFOLDER_DAILY else ""
+        if dest_folder is not None and folder not in listed:
+            listed.add(folder)
+            try:
+                names = os.listdir(os.path.join(dest_folder, folder))
+            except OSError:
+                names = []
+            taken.update(os.path.join(folder, name).lower() for name in names)
+        dest_rel = os.path.join(folder, entry.name)
+        if dest_rel.lower() in taken:
+            stem, ext = os.path.splitext(entry.name)
+            parent = os.path.basename(os.path.dirname(entry.path))
+            dest_rel = os.path.join(folder, f"{stem}_{parent}{ext}")
+            number = 1
+            while dest_rel.lower() in taken:
+                number += 1
+                dest_rel = os.path.join(folder, f"{stem}_{parent}_{number}{ext}")
+        taken.add(dest_rel.lower())
+        dest_paths[position] = dest_rel
+    return list(zip(entries, dest_paths))
+
+
+OPERATION_COPY = "Kopiowanie"
+OPERATION_MOVE = "Przenoszenie"
+NAMING_DATE = "Data i źródło"
+NAMING_RANGE = "Zakres dat i źródło"
+NAMING_AUTO = "auto"  # zakres dat, jeśli pliki pochodzą z więcej niż jednego dnia (jak po analizie w formularzu)
+
+DEFAULT_OPTIONS = {
+    "operation": OPERATION_COPY,
+    "buffer": "Dynamiczny",
+    "use_exif": True,
+    "date_workers": DEFAULT_DATE_WORKERS,
+    "naming": NAMING_DATE,
+    "source_short": "",
+    "source_entry": "",
+    "suffix": False,
+    "subfolder": SUBFOLDER_DAILY,
+    "log": False,
+    "incremental": False,
+    "verify": False,
+    "duplicates": DUPLICATES_COPY,
+    "profile": False,
+    "pipeline": True,
+    "dry_run": False,
+    "catalog": True,
+}
+
+
+class ImportFailed(Exception):
+    pass
+
+
+JOURNAL_FILE = ".importer-journal.jsonl"
+PART_SUFFIX = ".importer-part"
+JOURNAL_SYNC_INTERVAL = 32  # wpisy "done" zapisywane na dysk (fsync) co tyle plików
+
+
+# Dziennik importu w katalogu docelowym: najpierw plan (lista plików i ustawienia), potem po jednym
+# wpisie na każdy zakończony plik. Po awarii import można wznowić dokładnie od miejsca przerwania.
+# Dziennik jest usuwany po zakończeniu importu (razem z sufiksem, logiem i sumami kontrolnymi).
+class ImportJournal:
+    def __init__(self, folder):
+        self.path = os.path.join(folder, JOURNAL_FILE)
+        self.file = None
+        self.pending = 0
+
+    # Katalogi w lokalizacji docelowej z niedokończonym importem
+    @staticmethod
+    def find_unfinished(dest_path):
+        try:
+            names = sorted(os.listdir(dest_path))
+        except OSError:
+            return []
+        return [os.path.join(dest_path, name) for name in names
+                if os.path.isfile(os.path.join(dest_path, name, JOURNAL_FILE))]
+
+    def begin(self, source_path, dest_path, options, planned):
+        files = [[os.path.relpath(entry.path, source_path), dest_rel, entry.size, entry.mtime, entry.ctime,
+                  entry.date.isoformat(), entry.date_origin] for entry, dest_rel in planned]
+        plan = {"type": "plan", "source": source_path, "dest": dest_path,
+                "folder": os.path.basename(os.path.dirname(self.path)), "options": options, "files": files}
+        self.file = open(self.path, "w", encoding="utf-8")
+        self.file.write(json.dumps(plan, ensure_ascii=False) + "\n")
+        self.sync()
+
+    def load(self):
+        plan = None
+        done = {}
+        duplicates = set()
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Ostatnia linia urwana w trakcie zapisu
+                    break
+                if record["type"] == "plan":
+                    plan = record
+                elif record["type"] == "done":
+                    done[record["index"]] = record.get("checksum")
+                elif record["type"] == "duplicate":
+                    duplicates.add(record["index"])
+        if plan is None:
+            raise ImportFailed(f"Dziennik importu {self.path} jest uszkodzony.")
+        return plan, done, duplicates
+
+    def reopen(self):
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def mark(self, index, kind="done", checksum=None):
+        record = {"type": kind, "index": index}
+        if checksum:
+            record["checksum"] = checksum
+        self.file.write(json.dumps(record) + "\n")
+        self.pending += 1
+        if self.pending >= JOURNAL_SYNC_INTERVAL:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self):
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+    @staticmethod
+    def remove(folder):
+        try:
+            os.remove(os.path.join(folder, JOURNAL_FILE))
+        except FileNotFoundError:
+            pass
+
+
+# Wynik importu - wspólny dla formularza i trybu wsadowego
+class ImportResult:
+    def __init__(self, manifest):
+        self.manifest = manifest
+        self.dest_folder = None
+        # Same liczniki zamiast list plików - pamięć nie rośnie z liczbą plików na karcie
+        self.copied_count = 0
+        self.skipped_count = 0
+        self.duplicate_count = 0
+        self.extension_counts = collections.Counter()
+        self.total_size = 0
+        self.cancelled = False
+        self.log_file = None
+        self.log_stream_file = None
+        self.checksum_file = None
+        self.stats_file = None
+        self.profile_file = None
+        self.stats = None
+
+    def to_dict(self):
+        return {
+            "dest_folder": self.dest_folder,
+            "copied": self.copied_count,
+            "copied_bytes": self.total_size,
+            "skipped": self.skipped_count,
+            "duplicates": self.duplicate_count,
+            "source_files": len(self.manifest),
+            "source_bytes": self.manifest.total_size,
+            "cancelled": self.cancelled,
+            "log_file": self.log_file,
+            "log_stream_file": self.log_stream_file,
+            "checksum_file": self.checksum_file,
+            "stats_file": self.stats_file,
+            "profile_file": self.profile_file,
+            "stats": self.stats.to_dict() if self.stats is not None else None,
+        }
+
+    def add_copied(self, entry):
+        self.copied_count += 1
+        self.total_size += entry.size
+        self.extension_counts[entry.ext] += 1
+
+
+# Cały import: skan -> daty -> nazwa katalogu -> kopiowanie -> sufiks -> log.
+# Postęp trafia do funkcji report jako słowniki z kluczem "event" (formularz i tryb wsadowy).
+class ImportJob:
+    # selection - ścieżki plików wybranych w podglądzie karty (None - wszystkie pliki)
+    def __init__(self, source_path, dest_path, options=None, manifest=None, report=None, selection=None):
+        self.source_path = source_path
+        self.dest_path = dest_path
+        self.options = dict(DEFAULT_OPTIONS, **(options or {}))
+        self.manifest = manifest
+        self.selection = selection
+        self.report = report or (lambda event: None)
+        self.cancel_event = threading.Event()
+        self.stats = Instrumentation()
+        self.resume_folder = None
+        # Semafor ograniczający równoczesne zapisy na dysk docelowy (ustawiany przez ImportScheduler)
+        self.write_slots = None
+
+    # Wznowienie przerwanego importu z dziennika w katalogu docelowym; source_path podaje się,
+    # gdy karta jest teraz zamontowana pod inną ścieżką
+    @classmethod
+    def resume(cls, folder, source_path=None, report=None):
+        # Ścieżka bezwzględna: indeksy zapisują pełne ścieżki plików, a ukośnik na końcu (np. z dopełniania
+        # w powłoce) psułby nazwę katalogu z sufiksem
+        folder = os.path.abspath(folder)
+        plan, _, _ = ImportJournal(folder).load()
+        job = cls(source_path or plan["source"], os.path.dirname(folder), plan["options"],
+                  report=report)
+        job.resume_folder = folder
+        return job
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def emit(self, event, **fields):
+        self.report(dict(event=event, **fields))
+
+    def run(self):
+        if not self.options["profile"]:
+            return self.run_import()
+        import cProfile
+        profiler = cProfile.Profile()
+        result = profiler.runcall(self.run_import)
+        if result.dest_folder:
+            result.profile_file = os.path.join(result.dest_folder,
+                                               f"PROFIL-{os.path.basename(result.dest_folder)}.prof")
+            profiler.dump_stats(result.profile_file)
+            self.emit("profile", path=result.profile_file)
+        return result
+
+    def run_import(self):
+        if self.resume_folder:
+            manifest, planned, main_dest_folder, journal, done, duplicates = self.load_journal()
+            result = ImportResult(manifest)
+            index = ImportIndex() if self.options["incremental"] else None
+        else:
+            manifest = self.manifest
+            if manifest is None or manifest.root != self.source_path:
+                self.emit("status", message="Skanowanie karty...")
+                started = time.perf_counter()
+                manifest = scan_media(self.source_path)
+                self.stats.add("scan", time.perf_counter() - started, size=manifest.total_size, count=len(manifest))
+                self.emit("manifest", manifest=manifest)
+
+            self.emit("status", message="Odczytywanie dat...")
+            manifest.resolve_dates(use_exif=self.options["use_exif"], workers=self.options["date_workers"],
+                                   cache=MetadataCache(), stats=self.stats)
+
+            result = ImportResult(manifest)
+            entries = manifest.entries
+            if self.selection is not None:
+                entries = [entry for entry in entries if entry.path in self.selection]
+                if not entries:
+                    raise ImportFailed("Nie wybrano żadnego pliku do importu.")
+            index = None
+            if self.options["incremental"]:
+                self.emit("status", message="Sprawdzanie zaimportowanych plików...")
+                index = ImportIndex()
+                with self.stats.measure("incremental_index", count=len(entries)):
+                    entries, skipped_entries = index.partition(self.options["source_entry"], entries)
+                result.skipped_count = len(skipped_entries)
+                if not entries:
+                    result.stats = self.stats
+                    self.emit("finished", result=result)
+                    return result
+
+            # Nazwa katalogu wynika z dat plików, które faktycznie zostaną zaimportowane
+            first_file_date, latest_file_date = manifest.date_range(entries)
+            if not first_file_date:
+                raise ImportFailed("Nie można ustalić dat dla plików w katalogu źródłowym.")
+            for entry in entries:
+                if not entry.date:
+                    raise ImportFailed(f"Nie można pobrać daty z pliku {entry.name}")
+
+            naming = self.options["naming"]
+            if naming == NAMING_AUTO:
+                naming = NAMING_RANGE if first_file_date != latest_file_date else NAMING_DATE
+            main_folder_name = build_main_folder_name(naming, first_file_date, latest_file_date,
+                                                      self.options["source_short"])
+            main_dest_folder = os.path.join(self.dest_path, main_folder_name)
+            with self.stats.measure("plan", count=len(entries)):
+                planned = plan_layout(entries, self.options["subfolder"], main_dest_folder)
+            if self.options["dry_run"]:
+                return self.report_plan(result, main_dest_folder, planned)
+            os.makedirs(main_dest_folder, exist_ok=True)
+
+            journal = ImportJournal(main_dest_folder)
+            journal.begin(self.source_path, self.dest_path, self.options, planned)
+            done = {}
+            duplicates = set()
+
+        result.stats = self.stats
+        engine = CopyEngine(self.options["buffer"])
+        remaining = [position for position in range(len(planned))
+                     if position not in done and position not in duplicates]
+        self.emit("start", files=len(remaining), bytes=sum(planned[position][0].size for position in remaining))
+
+        # Indeks duplikatów uzupełniany przy każdym imporcie - późniejsze wyszukiwanie nie przegląda archiwum
+        dedup = DedupIndex(self.dest_path)
+        find_duplicates = self.options["duplicates"] != DUPLICATES_COPY
+        if find_duplicates:
+            self.emit("status", message="Wczytywanie indeksu archiwum...")
+            dedup.load()
+
+        log = ImportLogWriter(main_dest_folder) if self.options["log"] else None
+        checksums = ChecksumWriter(main_dest_folder) if self.options["verify"] else None
+        catalog = ArchiveCatalog(self.dest_path) if self.options["catalog"] else None
+
+        # Pliki zakończone przed przerwaniem - bez ponownego odczytu z karty. Ich wpisy w logu, indeksach
+        # i katalogu archiwum mogły w chwili awarii czekać jeszcze w buforach, więc są zapisywane ponownie
+        # (indeksy nadpisują te same wiersze, log i sumy kontrolne dostają tylko brakujące wpisy - także dla
+        # plików zapisanych w logu, ale jeszcze nie w dzienniku, które są kopiowane ponownie).
+        logged = log.logged_destinations() if log is not None and self.resume_folder else set()
+        checksummed = checksums.recorded_paths() if checksums is not None and self.resume_folder else set()
+        for position, (entry, dest_rel) in enumerate(planned):
+            if position in duplicates:
+                result.duplicate_count += 1
+            if position not in done:
+                continue
+            dest_file = os.path.join(main_dest_folder, dest_rel)
+            checksum = done[position]
+            if log is not None and dest_rel not in logged:
+                log.write(entry, dest_rel, 0.0, checksum)
+            if index is not None:
+                # Zawartość kopii jest taka sama jak pliku z karty, którego przy przenoszeniu już nie ma
+                entry.partial_hash = compute_partial_hash(dest_file, entry.size)
+                index.record(self.options["source_entry"], entry, dest_file, entry.partial_hash)
+            dedup.add(dest_file, entry, checksum)
+            if catalog is not None:
+                catalog.add(dest_file, entry, self.options["source_short"], checksum)
+            if checksum and dest_rel not in checksummed:
+                checksums.write(dest_rel, checksum)
+            result.add_copied(entry)
+
+        # Karta i dysk docelowy to różne urządzenia - odczyt i zapis mogą się nakładać.
+        # Na tym samym urządzeniu zostaje kopiowanie w jądrze i szybka zmiana nazwy.
+        # Duplikaty ustalane przed kopiowaniem - potok czyta z karty tylko pliki, które trzeba przesłać
+        duplicate_sources = {}
+        if find_duplicates:
+            self.emit("status", message="Wyszukiwanie duplikatów w archiwum...")
+            for position in remaining:
+                if self.cancel_event.is_set():
+                    break
+                entry = planned[position][0]
+                # Przeniesiony przed awarią - obsługiwany przez recover
+                if self.resume_folder and not os.path.exists(entry.path):
+                    continue
+                duplicate_of = self.stats.call("dedup_lookup", dedup.find_duplicate, entry, path=entry.path)
+                if duplicate_of:
+                    duplicate_sources[position] = duplicate_of
+
+        if self.options["pipeline"] and get_device_key(self.source_path) != get_device_key(self.dest_path):
+            engine.start_pipeline([planned[position][0].path for position in remaining
+                                   if position not in duplicate_sources])
+
+        # Każdy katalog dnia tworzony raz, przy pierwszym pliku, który do niego trafia
+        created_dirs = {main_dest_folder}
+        try:
+            for position in remaining:
+                # Przerwanie następuje dopiero po zakończeniu bieżącego pliku
+                if self.cancel_event.is_set():
+                    break
+
+                entry, dest_rel = planned[position]
+                dest_file = os.path.join(main_dest_folder, dest_rel)
+                dest_dir_name = os.path.dirname(dest_file)
+
+                if self.resume_folder and not os.path.exists(entry.path):
+                    # Przenoszenie przerwane po usunięciu pliku z karty - kopia jest już w katalogu docelowym
+                    checksum = self.recover(engine, entry, dest_file)
+                    journal.mark(position, checksum=checksum)
+                    if log is not None and dest_rel not in logged:
+                        log.write(entry, dest_rel, 0.0, checksum)
+                    if index is not None:
+                        entry.partial_hash = compute_partial_hash(dest_file, entry.size)
+                        index.record(self.options["source_entry"], entry, dest_file, entry.partial_hash)
+                    dedup.add(dest_file, entry, checksum)
+                    if catalog is not None:
+                        catalog.add(dest_file, entry, self.options["source_short"], checksum)
+                    if checksum and dest_rel not in checksummed:
+                        checksums.write(dest_rel, checksum)
+                    result.add_copied(entry)
+                    self.emit("file", path=dest_file, size=entry.size)
+                    continue
+
+                # Skrót liczony przed przeniesieniem - po nim pliku nie ma już na karcie
+                partial_hash = get_partial_hash(entry) if index is not None else None
+
+                duplicate_of = duplicate_sources.get(position)
+                if duplicate_of and (self.options["duplicates"] == DUPLICATES_SKIP
+                                     or os.path.abspath(duplicate_of) == os.path.abspath(dest_file)):
+                    journal.mark(position, "duplicate")
+                    result.duplicate_count += 1
+                    self.emit("duplicate", path=entry.path, duplicate_of=duplicate_of, size=entry.size)
+                    continue
+
+                if dest_dir_name not in created_dirs:
+                    with self.stats.measure("makedirs"):
+                        os.makedirs(dest_dir_name, exist_ok=True)
+                    created_dirs.add(dest_dir_name)
+                # Zapis pod tymczasową nazwą i atomowa zmiana nazwy - w katalogu nie zostaje urwany plik
+                part_file = dest_file + PART_SUFFIX
+                with self.write_slots or contextlib.nullcontext():
+                    started = time.perf_counter()
+                    checksum = self.stats.call("copy", self.transfer, engine, entry, part_file, duplicate_of,
+                                               path=entry.path, size=entry.size)
+                    duration = time.perf_counter() - started
+                os.replace(part_file, dest_file)
+                # Plik oznaczony w dzienniku jako gotowy musi przetrwać awarię zasilania
+                fsync_directory(dest_dir_name)
+                journal.mark(position, checksum=checksum)
+                if log is not None and dest_rel not in logged:
+                    log.write(entry, dest_rel, duration, checksum)
+                if checksum and dest_rel not in checksummed:
+                    checksums.write(dest_rel, checksum)
+
+                if index is not None:
+                    index.record(self.options["source_entry"], entry, dest_file, partial_hash)
+                dedup.add(dest_file, entry, checksum)
+                if catalog is not None:
+                    catalog.add(dest_file, entry, self.options["source_short"], checksum)
+                result.add_copied(entry)
+                self.emit("file", path=dest_file, size=entry.size)
+        finally:
+            engine.stop_pipeline()
+            journal.close()
+            if log is not None:
+                log.close()
+            if checksums is not None:
+                checksums.close()
+            if index is not None:
+                index.flush()
+            dedup.save()
+            if catalog is not None:
+                catalog.flush()
+
+        result.cancelled = (self.cancel_event.is_set()
+                            and result.copied_count + result.duplicate_count < len(planned))
+
+        # Wszystkie pliki okazały się duplikatami - pusty katalog nie jest potrzebny. Dziennik oraz pusty log
+        # i plik sum kontrolnych to pliki robocze tego importu, więc nie blokują usunięcia katalogu.
+        if not result.copied_count:
+            ImportJournal.remove(main_dest_folder)
+            for work_file in (LOG_STREAM_FILE, CHECKSUM_STREAM_FILE):
+                work_path = os.path.join(main_dest_folder, work_file)
+                if os.path.exists(work_path) and not os.path.getsize(work_path):
+                    os.remove(work_path)
+            try:
+                os.rmdir(main_dest_folder)
+            except OSError:
+                result.dest_folder = main_dest_folder
+        else:
+            result.dest_folder = main_dest_folder
+
+        if result.dest_folder:
+            # Dziennik zostaje po przerwaniu - import można wznowić
+            if result.cancelled:
+                self.emit("resumable", path=result.dest_folder)
+            else:
+                self.finalize(result)
+                ImportJournal.remove(result.dest_folder)
+        self.emit("finished", result=result)
+        return result
+
+    # Podgląd bez kopiowania: docelowa ścieżka każdego pliku i podsumowanie planu
+    def report_plan(self, result, main_dest_folder, planned):
+        directories = set()
+        for entry, dest_rel in planned:
+            directories.add(os.path.dirname(dest_rel))
+            self.emit("planned", path=entry.path, dest=os.path.join(main_dest_folder, dest_rel), size=entry.size)
+        self.emit("plan", folder=main_dest_folder, files=len(planned), bytes=sum(entry.size for entry, _ in planned),
+                  directories=len(directories - {""}),
+                  renamed=sum(1 for entry, dest_rel in planned if os.path.basename(dest_rel) != entry.name))
+        result.stats = self.stats
+        self.emit("finished", result=result)
+        return result
+
+    def load_journal(self):
+        self.emit("status", message="Wczytywanie dziennika importu...")
+        journal = ImportJournal(self.resume_folder)
+        plan, done, duplicates = journal.load()
+        manifest = ScanManifest(self.source_path)
+        planned = []
+        for src_rel, dest_rel, size, mtime, ctime, date, date_origin in plan["files"]:
+            path = os.path.join(self.source_path, src_rel)
+            entry = manifest[manifest.add(os.path.dirname(path), os.path.basename(path), size, mtime, ctime)]
+            entry.date = datetime.date.fromisoformat(date)
+            entry.date_origin = date_origin
+            planned.append((entry, dest_rel))
+        # Sufiks dodany już przed awarią - katalog ma inną nazwę niż w planie
+        if os.path.basename(os.path.abspath(self.resume_folder)) != plan["folder"]:
+            self.options["suffix"] = False
+        journal.reopen()
+        return manifest, planned, self.resume_folder, journal, done, duplicates
+
+    # Plik, którego nie ma już na karcie: kopia pod nazwą tymczasową lub docelową musi być kompletna
+    def recover(self, engine, entry, dest_file):
+        part_file = dest_file + PART_SUFFIX
+        if os.path.exists(part_file) and os.path.getsize(part_file) == entry.size:
+            os.replace(part_file, dest_file)
+            fsync_directory(os.path.dirname(dest_file))
+        elif not (os.path.exists(dest_file) and os.path.getsize(dest_file) == entry.size):
+            raise ImportFailed(f"Nie można wznowić importu: brak pliku {entry.path} na karcie "
+                               f"i jego kompletnej kopii w katalogu docelowym.")
+        return engine.hash_file(dest_file, entry.size) if self.options["verify"] else None
+
+    # Przeniesienie jednego pliku; zwraca sumę kontrolną, jeśli była liczona
+    def transfer(self, engine, entry, dest_file, duplicate_of=None):
+        if duplicate_of:
+            # Zawartość już jest w archiwum - plik na karcie zostaje nawet przy przenoszeniu
+            try:
+                if self.options["duplicates"] == DUPLICATES_HARDLINK:
+                    if os.path.lexists(dest_file):
+                        os.remove(dest_file)
+                    os.link(duplicate_of, dest_file)
+                else:
+                    engine.clone(duplicate_of, dest_file)
+                return None
+            except OSError:
+                # Inny system plików lub brak obsługi - zwykłe kopiowanie z karty
+                pass
+
+        if self.options["verify"]:
+            if self.options["operation"] == OPERATION_COPY:
+                _, checksum = engine.copy_verified(entry.path, dest_file, entry.size)
+            else:
+                _, checksum = engine.move_verified(entry.path, dest_file, entry.size)
+            return checksum
+        if self.options["operation"] == OPERATION_COPY:
+            engine.copy(entry.path, dest_file, entry.size)
+        elif self.options["operation"] == OPERATION_MOVE:
+            engine.move(entry.path, dest_file, entry.size)
+        return None
+
+    # Indeksy zapisują ścieżki plików - po dodaniu sufiksu wskazywałyby na nieistniejący katalog
+    def folder_renamed(self, old_folder, new_folder):
+        try:
+            if self.options["incremental"]:
+                ImportIndex().rename_folder(old_folder, new_folder)
+            DedupIndex(self.dest_path).rename_folder(old_folder, new_folder)
+            if self.options["catalog"]:
+                ArchiveCatalog(self.dest_path).rename_folder(old_folder, new_folder)
+        except (sqlite3.Error, OSError) as e:
+            self.emit("warning", message=f"Nie udało się zaktualizować indeksu archiwum: {e}")
+
+    def finalize(self, result):
+        if self.options["suffix"]:
+            old_folder = result.dest_folder
+            result.dest_folder = add_suffix(result.dest_folder, result.extension_counts)
+            if result.dest_folder != old_folder:
+                self.folder_renamed(old_folder, result.dest_folder)
+
+        if self.options["log"]:
+            try:
+                result.log_stream_file = os.path.join(result.dest_folder, LOG_STREAM_FILE)
+                result.log_file = write_log(result.log_stream_file, result.dest_folder, self.options, self.stats)
+                result.stats_file = write_stats_file(result.dest_folder, self.stats)
+                self.emit("log", path=result.log_file)
+            except OSError as e:
+                self.emit("warning", message=f"Nie udało się zapisać pliku logu: {e}")
+
+        result.checksum_file = ChecksumWriter.finish(result.dest_folder)
+        if result.checksum_file:
+            self.emit("checksums", path=result.checksum_file)
+
+
+DEFAULT_DEST_WRITERS = 2
+
+
+# Kolejka importów z wielu kart: zadania z tego samego urządzenia idą po kolei (jeden strumień
+# na czytnik), różne czytniki pracują równolegle, a zapisy na wspólny dysk docelowy są ograniczane.
+class ImportScheduler:
+    def __init__(self, jobs, max_dest_writers=DEFAULT_DEST_WRITERS):
+        self.jobs = jobs
+        self.results = [None] * len(jobs)
+        self.errors = [None] * len(jobs)
+        self.cancel_event = threading.Event()
+        write_slots = {}
+        for job in jobs:
+            dest_device = get_device_key(job.dest_path)
+            if dest_device not in write_slots:
+                write_slots[dest_device] = threading.BoundedSemaphore(max_dest_writers)
+            job.write_slots = write_slots[dest_device]
+
+    def device_groups(self):
+        groups = {}
+        for index, job in enumerate(self.jobs):
+            groups.setdefault(get_device_key(job.source_path), []).append(index)
+        return list(groups.values())
+
+    def cancel(self):
+        self.cancel_event.set()
+        for job in self.jobs:
+            job.cancel()
+
+    def run_group(self, indices):
+        for index in indices:
+            if self.cancel_event.is_set():
+                return
+            job = self.jobs[index]
+            try:
+                self.results[index] = job.run()
+            except ImportFailed as e:
+                self.errors[index] = str(e)
+            except Exception as e:
+                self.errors[index] = f"Wystąpił błąd: {e}"
+            if self.errors[index]:
+                job.emit("error", message=self.errors[index])
+
+    def run(self):
+        threads = [threading.Thread(target=self.run_group, args=(indices,), daemon=True)
+                   for indices in self.device_groups()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.results
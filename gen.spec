@@ -26,7 +26,8 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    # Bez UPX - rozpakowywanie skompresowanych bibliotek przy każdym starcie wydłużało pojawienie się okna
+    upx=False,
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
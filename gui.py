@@ -0,0 +1,1051 @@
+import os
+import base64
+import collections
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk, scrolledtext, simpledialog
+import subprocess
+import threading
+import queue
+import time
+
+from engine import (DATE_ORIGIN_CREATION, DATE_ORIGIN_EXIF, DATE_ORIGIN_FILENAME, DEFAULT_DATE_WORKERS,
+                    DUPLICATE_MODES, DUPLICATES_COPY, OPERATION_MOVE, CardWatcher, ImportFailed, ImportJob,
+                    ImportJournal, ImportScheduler, MetadataCache, ThumbnailLoader, get_mount_point,
+                    get_short_name_from_source, load_sources, save_sources, scan_media, write_card_marker)
+
+
+# Wątek roboczy importu - raportuje postęp przez kolejkę, formularz odczytuje ją przez root.after
+class ImportWorker(threading.Thread):
+    def __init__(self, job):
+        super().__init__(daemon=True)
+        self.job = job
+        self.events = queue.Queue()
+        job.report = self.events.put
+
+    def cancel(self):
+        self.job.cancel()
+
+    def run(self):
+        try:
+            self.job.run()
+        except ImportFailed as e:
+            self.events.put({"event": "error", "message": str(e)})
+        except Exception as e:
+            self.events.put({"event": "error", "message": f"Wystąpił błąd: {e}"})
+
+
+# Skan i analiza dat karty w tle - formularz pokazuje liczbę i rozmiar plików na bieżąco
+class CardScanner(threading.Thread):
+    def __init__(self, path, date_workers):
+        super().__init__(daemon=True)
+        self.path = path
+        self.date_workers = date_workers
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def report_progress(self, files, size):
+        self.events.put({"event": "progress", "files": files, "bytes": size})
+
+    def run(self):
+        try:
+            manifest = scan_media(self.path, progress=self.report_progress, cancel_event=self.cancel_event)
+            if self.cancel_event.is_set():
+                return
+            self.events.put({"event": "scanned", "manifest": manifest})
+            manifest.resolve_dates(use_exif=True, workers=self.date_workers, cache=MetadataCache())
+            self.events.put({"event": "analyzed", "manifest": manifest})
+        except Exception as e:
+            self.events.put({"event": "error", "message": f"Wystąpił błąd: {e}"})
+
+
+PREVIEW_CELL_WIDTH = 180
+PREVIEW_CELL_HEIGHT = 160
+PREVIEW_COLUMNS = 5
+PREVIEW_ROWS = 4
+PREVIEW_IMAGE_LIMIT = 300  # miniatury trzymane w pamięci okna; pozostałe wracają z pamięci podręcznej na dysku
+
+
+# Podgląd zawartości karty - siatka miniatur, rysowane są tylko widoczne wiersze.
+# Kliknięcie zaznacza lub odznacza plik; zaznaczone pliki można zaimportować.
+class PreviewWindow:
+    def __init__(self, app, manifest, selection=None):
+        self.app = app
+        self.manifest = manifest
+        self.entries = manifest.entries
+        self.selected = set(selection) if selection is not None else {entry.path for entry in self.entries}
+        self.images = collections.OrderedDict()
+        self.missing = set()
+        self.columns = PREVIEW_COLUMNS
+        self.loader = ThumbnailLoader(manifest.root)
+
+        self.window = tk.Toplevel(app.root)
+        self.window.title(f"Podgląd karty: {manifest.root}")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.canvas = tk.Canvas(self.window, width=PREVIEW_COLUMNS * PREVIEW_CELL_WIDTH,
+                                height=PREVIEW_ROWS * PREVIEW_CELL_HEIGHT, background="#D3D3D3", highlightthickness=0)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        scrollbar = ttk.Scrollbar(self.window, orient="vertical", command=self.scroll)
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.window.rowconfigure(0, weight=1)
+        self.window.columnconfigure(0, weight=1)
+
+        frame = ttk.Frame(self.window)
+        frame.grid(row=1, column=0, columnspan=2, pady=4, sticky="ew")
+        ttk.Button(frame, text="Zaznacz wszystkie", command=lambda: self.select_all(True)).grid(row=0, column=0, padx=5)
+        ttk.Button(frame, text="Odznacz wszystkie", command=lambda: self.select_all(False)).grid(row=0, column=1,
+                                                                                              padx=5)
+        ttk.Button(frame, text="Importuj zaznaczone", command=self.import_selected).grid(row=0, column=2, padx=5)
+        self.count_label = ttk.Label(frame, text="")
+        self.count_label.grid(row=0, column=3, padx=5)
+        self.update_count()
+
+        self.canvas.bind("<Configure>", self.redraw)
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Button-4>", self.on_wheel)
+        self.canvas.bind("<Button-5>", self.on_wheel)
+        self.after_id = self.window.after(100, self.poll)
+
+    def scroll(self, *args):
+        self.canvas.yview(*args)
+        self.redraw()
+
+    def on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.canvas.yview_scroll(-1, "units")
+        else:
+            self.canvas.yview_scroll(1, "units")
+        self.redraw()
+
+    def visible_range(self):
+        self.columns = max(1, self.canvas.winfo_width() // PREVIEW_CELL_WIDTH)
+        rows = -(-len(self.entries) // self.columns)
+        self.canvas.configure(scrollregion=(0, 0, self.columns * PREVIEW_CELL_WIDTH, rows * PREVIEW_CELL_HEIGHT),
+                              yscrollincrement=PREVIEW_CELL_HEIGHT // 4)
+        top = self.canvas.canvasy(0)
+        bottom = self.canvas.canvasy(self.canvas.winfo_height())
+        first = int(top // PREVIEW_CELL_HEIGHT) * self.columns
+        last = min(len(self.entries), (int(bottom // PREVIEW_CELL_HEIGHT) + 1) * self.columns)
+        return first, last
+
+    def redraw(self, _event=None):
+        first, last = self.visible_range()
+        self.canvas.delete("cell")
+        for index in range(first, last):
+            self.draw_cell(index)
+        visible = self.entries[first:last]
+        self.loader.request([entry for entry in visible
+                             if entry.path not in self.images and entry.path not in self.missing])
+
+    def draw_cell(self, index):
+        entry = self.entries[index]
+        row, column = divmod(index, self.columns)
+        x = column * PREVIEW_CELL_WIDTH
+        y = row * PREVIEW_CELL_HEIGHT
+        center = x + PREVIEW_CELL_WIDTH // 2
+        selected = entry.path in self.selected
+        self.canvas.create_rectangle(x + 4, y + 4, x + PREVIEW_CELL_WIDTH - 4, y + PREVIEW_CELL_HEIGHT - 4,
+                                     fill="white", outline="#1E6FD9" if selected else "#A0A0A0",
+                                     width=3 if selected else 1, tags="cell")
+        image = self.images.get(entry.path)
+        if image is not None:
+            self.canvas.create_image(center, y + 68, image=image, tags="cell")
+        else:
+            # Plik bez miniatury - rozszerzenie zamiast obrazu; "..." dopóki miniatura się ładuje
+            text = entry.ext.lstrip(".").upper() if entry.path in self.missing else "..."
+            self.canvas.create_text(center, y + 68, text=text, fill="#808080", font=("Calibri", 14), tags="cell")
+        self.canvas.create_text(center, y + PREVIEW_CELL_HEIGHT - 18, text=entry.name,
+                                width=PREVIEW_CELL_WIDTH - 12, font=("Calibri", 9), tags="cell")
+        if selected:
+            self.canvas.create_text(x + 16, y + 16, text="✔", fill="#1E6FD9", font=("Calibri", 12, "bold"),
+                                    tags="cell")
+
+    def on_click(self, event):
+        column = int(self.canvas.canvasx(event.x) // PREVIEW_CELL_WIDTH)
+        row = int(self.canvas.canvasy(event.y) // PREVIEW_CELL_HEIGHT)
+        index = row * self.columns + column
+        if column >= self.columns or index >= len(self.entries):
+            return
+        path = self.entries[index].path
+        if path in self.selected:
+            self.selected.discard(path)
+        else:
+            self.selected.add(path)
+        self.update_count()
+        self.redraw()
+
+    def poll(self):
+        changed = False
+        try:
+            while True:
+                path, data = self.loader.results.get_nowait()
+                if data:
+                    self.images[path] = tk.PhotoImage(data=base64.b64encode(data).decode("ascii"))
+                    # Najdawniej załadowane miniatury zwalniane - przy powrocie wczytają się z pamięci podręcznej
+                    while len(self.images) > PREVIEW_IMAGE_LIMIT:
+                        old_path, _ = self.images.popitem(last=False)
+                        self.loader.forget(old_path)
+                else:
+                    self.missing.add(path)
+                changed = True
+        except queue.Empty:
+            pass
+        if changed:
+            self.redraw()
+        self.after_id = self.window.after(100, self.poll)
+
+    def update_count(self):
+        self.count_label.config(text=f"Zaznaczono: {len(self.selected)} z {len(self.entries)}")
+
+    def select_all(self, selected):
+        self.selected = {entry.path for entry in self.entries} if selected else set()
+        self.update_count()
+        self.redraw()
+
+    def import_selected(self):
+        if not self.selected:
+            messagebox.showwarning("Błąd", "Nie zaznaczono żadnego pliku.", parent=self.window)
+            return
+        self.app.set_selection(self.manifest, self.selected)
+        self.close()
+
+    def close(self):
+        self.window.after_cancel(self.after_id)
+        self.loader.close()
+        self.window.destroy()
+
+
+# Funkcja wykonywana w osobnym wątku; callback dostaje wynik już w wątku Tk (przez root.after)
+def run_in_background(root, function, callback):
+    result = {}
+
+    def target():
+        result["value"] = function()
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+
+    def poll():
+        if thread.is_alive():
+            root.after(50, poll)
+        elif "value" in result:
+            callback(result["value"])
+
+    root.after(50, poll)
+
+
+# Wiersz kolejki importów - osobny pasek postępu i stan dla każdej karty
+class QueueRow:
+    def __init__(self, parent, row, title):
+        self.title_label = ttk.Label(parent, text=title)
+        self.title_label.grid(row=row, column=0, sticky="w", padx=5)
+        self.progress_bar = ttk.Progressbar(parent, orient="horizontal", length=250, mode="determinate")
+        self.progress_bar.grid(row=row, column=1, padx=5)
+        self.status_label = ttk.Label(parent, text="Oczekuje")
+        self.status_label.grid(row=row, column=2, sticky="w", padx=5)
+        self.total_files = 0
+        self.done_files = 0
+        self.done_bytes = 0
+        self.finished = False
+
+    def apply(self, event):
+        kind = event["event"]
+        if kind == "status":
+            self.status_label.config(text=event["message"])
+        elif kind == "start":
+            self.total_files = event["files"]
+            self.progress_bar["maximum"] = max(event["bytes"], 1)
+        elif kind in ("file", "duplicate"):
+            self.done_files += 1
+            self.done_bytes += event["size"]
+            self.progress_bar["value"] = self.done_bytes
+            self.status_label.config(text=f"{self.done_files}/{self.total_files} plików, "
+                                          f"{self.done_bytes / (1024 * 1024):.2f} MB")
+        elif kind == "finished":
+            self.finished = True
+            result = event["result"]
+            self.status_label.config(text=f"Zakończono: {result.copied_count} plików"
+                                          + (" (przerwano)" if result.cancelled else ""))
+        elif kind == "error":
+            self.finished = True
+            self.status_label.config(text=f"Błąd: {event['message']}")
+
+    def destroy(self):
+        self.title_label.destroy()
+        self.progress_bar.destroy()
+        self.status_label.destroy()
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+# Główna klasa aplikacji
+class ImporterApp:
+    def __init__(self, master):
+        self.root = master
+        self.root.title("Importer")
+        self.root.configure(padx=10, pady=5, background="#D3D3D3")  # Zmniejszamy padding
+
+        # Definiowanie wszystkich atrybutów instancji w __init__
+        self.source_var = tk.StringVar()
+        self.use_exif_var = tk.BooleanVar(value=True)
+        self.media_path_var = tk.StringVar()
+        self.operation_var = tk.StringVar(value="Kopiowanie")
+        self.buffer_var = tk.StringVar(value="Dynamiczny")  # Domyślnie dynamiczny
+        self.naming_var = tk.StringVar(value="Data i źródło")
+        self.suffix_var = tk.BooleanVar()
+        self.subfolder_var = tk.StringVar(value="Wszystkie pliki w jednym katalogu")
+        self.dest_path_var = tk.StringVar()
+        self.open_folder_var = tk.BooleanVar()
+        self.log_file_var = tk.BooleanVar()
+        self.incremental_var = tk.BooleanVar()
+        self.verify_var = tk.BooleanVar()
+        self.profile_var = tk.BooleanVar()
+        self.watch_cards_var = tk.BooleanVar()
+        self.duplicates_var = tk.StringVar(value=DUPLICATES_COPY)
+        self.sources = []
+        self.manifest = None
+        self.selection = None
+        self.scanner = None
+        self.card_watcher = None
+        self.card_events = queue.Queue()
+        self.worker = None
+        self.queue_frame = None
+        self.queued_jobs = []
+        self.queue_rows = []
+        self.queue_events = queue.Queue()
+        self.scheduler = None
+        self.scheduler_thread = None
+        self.progress_bar = None
+        self.progress_label = None
+        self.action_button = None
+        self.cancel_button = None
+        self.plan_button = None
+        self.progress_total_files = 0
+        self.progress_total_bytes = 0
+        self.progress_done_files = 0
+        self.progress_done_bytes = 0
+        self.progress_start_time = None
+
+        self.source_combobox = None
+        self.media_path_entry = None
+        self.file_info_label = None
+        self.date_source_var = tk.StringVar(value="EXIF")  # Domyślnie EXIF
+        self.date_workers_var = tk.IntVar(value=DEFAULT_DATE_WORKERS)
+        self.file_list_text = None
+        self.use_exif_radio = None
+        self.use_filename_radio = None
+        self.date_source_frame = None
+        self.date_source_label = None
+        self.date_source_dynamic = None
+        self.footer_text = None
+
+        # Media Source Section
+        self.create_media_source_section()
+
+        # Path Selection Section
+        self.create_path_selection_section()
+
+        # Operation Selection Section
+        self.create_operation_selection_section()
+
+        # Buffer Size Selection Section
+        self.create_buffer_size_section()
+
+        # Naming Format Section with EXIF or Filename Date
+        self.create_naming_format_section()
+
+        # Suffix Options
+        self.create_suffix_options_section()
+
+        # Subfolder Options Section
+        self.create_subfolder_options_section()
+
+        # Destination Path Section
+        self.create_destination_path_section()
+
+        # Additional Options Section
+        self.create_additional_options_section()
+
+        # File List Output Section
+        self.create_file_list_output_section()
+
+        # Action Buttons Section
+        self.create_action_buttons_section()
+
+        # Footer Section
+        self.create_footer_section()
+
+        # Import Queue Section
+        self.create_queue_section()
+
+    def create_media_source_section(self):
+        frame = ttk.Frame(self.root)
+        frame.grid(row=0, column=0, columnspan=2, pady=2, sticky="ew")
+
+        label = ttk.Label(frame, text="Źródło multimediów:", font=("Calibri", 12))
+        label.grid(row=0, column=0, sticky="w")
+
+        self.source_combobox = ttk.Combobox(frame, textvariable=self.source_var, values=self.sources, state="readonly")
+        self.source_combobox.grid(row=0, column=1, padx=5)
+        # source.txt wczytywany w tle - okno pojawia się bez czekania na dysk
+        self.load_sources()
+
+        add_button = ttk.Button(frame, text="Dodaj nowe źródło", command=self.add_source)
+        add_button.grid(row=0, column=2, padx=5)
+
+        remove_button = ttk.Button(frame, text="Usuń wybrane źródło", command=self.remove_source)
+        remove_button.grid(row=0, column=3, padx=5)
+
+    def create_path_selection_section(self):
+        frame = ttk.Frame(self.root)
+        frame.grid(row=1, column=0, columnspan=2, pady=2, sticky="ew")
+
+        label = ttk.Label(frame, text="Ścieżka do karty z multimediami:", font=("Calibri", 12))
+        label.grid(row=0, column=0, sticky="w")
+
+        self.media_path_entry = ttk.Entry(frame, textvariable=self.media_path_var, width=50)
+        self.media_path_entry.grid(row=0, column=1, padx=5)
+
+        browse_button = ttk.Button(frame, text="Wybierz ścieżkę", command=self.browse_media_path)
+        browse_button.grid(row=0, column=2, padx=5)
+
+        preview_button = ttk.Button(frame, text="Podgląd karty", command=self.open_preview)
+        preview_button.grid(row=0, column=3, padx=5)
+
+        remember_button = ttk.Button(frame, text="Zapamiętaj kartę", command=self.remember_card)
+        remember_button.grid(row=0, column=4, padx=5)
+
+        self.file_info_label = ttk.Label(frame, text="Zawartość:")
+        self.file_info_label.grid(row=1, column=0, columnspan=4, sticky="w")
+
+    def create_operation_selection_section(self):
+        frame = ttk.Frame(self.root)
+        frame.grid(row=2, column=0, columnspan=2, pady=2, sticky="ew")
+
+        label = ttk.Label(frame, text="Operacja:", font=("Calibri", 12))
+        label.grid(row=0, column=0, sticky="w")
+
+        copy_radio = ttk.Radiobutton(frame, text="Kopiowanie", variable=self.operation_var, value="Kopiowanie")
+        copy_radio.grid(row=0, column=1, padx=5)
+        move_radio = ttk.Radiobutton(frame, text="Przenoszenie", variable=self.operation_var, value="Przenoszenie")
+        move_radio.grid(row=0, column=2, padx=5)
+
+    def create_buffer_size_section(self):
+        frame = ttk.Frame(self.root)
+        frame.grid(row=3, column=0, columnspan=2, pady=2, sticky="ew")
+
+        label = ttk.Label(frame, text="Rozmiar bufora:", font=("Calibri", 12))
+        label.grid(row=0, column=0, sticky="w")
+
+        buffer_small = ttk.Radiobutton(frame, text="Mały (128 KB)", variable=self.buffer_var, value="Mały (128 KB)")
+        buffer_small.grid(row=0, column=1, padx=5)
+        buffer_medium = ttk.Radiobutton(frame, text="Średni (512 KB)", variable=self.buffer_var,
+                                        value="Średni (512 KB)")
+        buffer_medium.grid(row=0, column=2, padx=5)
+        buffer_large = ttk.Radiobutton(frame, text="Duży (1 MB)", variable=self.buffer_var, value="Duży (1 MB)")
+        buffer_large.grid(row=0, column=3, padx=5)
+        buffer_dynamic = ttk.Radiobutton(frame, text="Dynamiczny", variable=self.buffer_var, value="Dynamiczny")
+        buffer_dynamic.grid(row=0, column=4, padx=5)
+
+        dynamic_tooltip = tk.Label(frame, text="(automatycznie dopasuje się do rozmiaru plików)", font=("Calibri", 8),
+                                   foreground="gray")
+        dynamic_tooltip.grid(row=1, column=4, padx=5)
+
+    def create_naming_format_section(self):
+        frame = ttk.Frame(self.root)
+        frame.grid(row=4, column=0, columnspan=2, pady=2, sticky="ew")
+
+        label = ttk.Label(frame, text="Format nazwy folderu:", font=("Calibri", 12))
+        label.grid(row=0, column=0, sticky="w")
+
+        date_source_radio = ttk.Radiobutton(frame, text="Data i źródło", variable=self.naming_var,
+                                            value="Data i źródło")
+        date_source_radio.grid(row=0, column=1, padx=5)
+        date_range_radio = ttk.Radiobutton(frame, text="Zakres dat i źródło", variable=self.naming_var,
+                                           value="Zakres dat i źródło")
+        date_range_radio.grid(row=0, column=2, padx=5)
+
+        self.use_exif_radio = ttk.Radiobutton(frame, text="Odczytaj datę z EXIF", variable=self.use_exif_var,
+                                              value=True)
+        self.use_exif_radio.grid(row=1, column=1, padx=5)
+
+        self.use_filename_radio = ttk.Radiobutton(frame, text="Odczytaj datę z nazwy pliku", variable=self.use_exif_var,
+                                                  value=False)
+        self.use_filename_radio.grid(row=1, column=2, padx=5)
+
+        workers_label = ttk.Label(frame, text="Procesy odczytu dat:")
+        workers_label.grid(row=1, column=3, padx=5)
+        workers_spinbox = ttk.Spinbox(frame, from_=1, to=os.cpu_count() or 1, textvariable=self.date_workers_var,
+                                      width=4, state="readonly")
+        workers_spinbox.grid(row=1, column=4, padx=5)
+
+        self.date_source_frame = ttk.Frame(frame)
+        self.date_source_frame.grid(row=2, column=0, columnspan=3, sticky="w")
+
+        self.date_source_label = ttk.Label(self.date_source_frame, text="Daty:", font=("Calibri", 12))
+        self.date_source_label.grid(row=0, column=0, sticky="w")
+
+        self.date_source_dynamic = ttk.Label(self.date_source_frame, textvariable=self.date_source_var,
+                                             font=("Calibri", 12))
+        self.date_source_dynamic.grid(row=0, column=1, sticky="w")
+
+    def create_suffix_options_section(self):
+        frame = ttk.Frame(self.root)
+        frame.grid(row=5, column=0, columnspan=2, pady=2, sticky="ew")
+
+        suffix_checkbox = ttk.Checkbutton(frame, text="Dodaj P, M, PM do nazwy katalogu", variable=self.suffix_var)
+        suffix_checkbox.grid(row=0, column=0, sticky="w")
+
+    def create_subfolder_options_section(self):
+        frame = ttk.Frame(self.root)
+        frame.grid(row=6, column=0, columnspan=2, pady=2, sticky="ew")
+
+        single_folder_radio = ttk.Radiobutton(frame, text="Wszystkie pliki w jednym katalogu",
+                                              variable=self.subfolder_var,
+                                              value="Wszystkie pliki w jednym katalogu")
+        single_folder_radio.grid(row=0, column=0, padx=5)
+        daily_subfolder_radio = ttk.Radiobutton(frame, text="Twórz podkatalogi na każdy dzień",
+                                                variable=self.subfolder_var,
+                                                value="Twórz podkatalogi na każdy dzień")
+        daily_subfolder_radio.grid(row=0, column=1, padx=5)
+
+    def create_destination_path_section(self):
+        frame = ttk.Frame(self.root)
+        frame.grid(row=7, column=0, columnspan=2, pady=2, sticky="ew")
+
+        label = ttk.Label(frame, text="Lokalizacja wygenerowanego katalogu:", font=("Calibri", 12))
+        label.grid(row=0, column=0, sticky="w")
+
+        dest_path_entry = ttk.Entry(frame, textvariable=self.dest_path_var, width=50)
+        dest_path_entry.grid(row=0, column=1, padx=5)
+
+        browse_button = ttk.Button(frame, text="Wybierz lokalizację", command=self.browse_dest_path)
+        browse_button.grid(row=0, column=2, padx=5)
+
+    def create_additional_options_section(self):
+        frame = ttk.Frame(self.root)
+        frame.grid(row=8, column=0, columnspan=2, pady=2, sticky="ew")
+
+        open_folder_checkbox = ttk.Checkbutton(frame, text="Otwórz folder po zakończeniu",
+                                               variable=self.open_folder_var)
+        open_folder_checkbox.grid(row=0, column=0, sticky="w")
+
+        log_file_checkbox = ttk.Checkbutton(frame, text="Generuj plik log", variable=self.log_file_var)
+        log_file_checkbox.grid(row=0, column=1, sticky="w")
+
+        incremental_checkbox = ttk.Checkbutton(frame, text="Import przyrostowy (pomiń już zaimportowane)",
+                                               variable=self.incremental_var)
+        incremental_checkbox.grid(row=0, column=2, sticky="w")
+
+        verify_checkbox = ttk.Checkbutton(frame, text="Weryfikuj sumy kontrolne", variable=self.verify_var)
+        verify_checkbox.grid(row=1, column=0, sticky="w")
+
+        duplicates_label = ttk.Label(frame, text="Duplikaty w archiwum:")
+        duplicates_label.grid(row=1, column=1, sticky="e")
+        duplicates_combobox = ttk.Combobox(frame, textvariable=self.duplicates_var, values=DUPLICATE_MODES,
+                                           state="readonly", width=18)
+        duplicates_combobox.grid(row=1, column=2, sticky="w", padx=5)
+
+        profile_checkbox = ttk.Checkbutton(frame, text="Profilowanie (cProfile)", variable=self.profile_var)
+        profile_checkbox.grid(row=2, column=0, sticky="w")
+
+        watch_checkbox = ttk.Checkbutton(frame, text="Obserwuj włożone karty", variable=self.watch_cards_var,
+                                         command=self.toggle_card_watcher)
+        watch_checkbox.grid(row=2, column=1, sticky="w")
+
+    def create_file_list_output_section(self):
+        label = ttk.Label(self.root, text="Lista skopiowanych plików:", font=("Calibri", 12))
+        label.grid(row=9, column=0, sticky="w")
+
+        self.file_list_text = scrolledtext.ScrolledText(self.root, width=60, height=10, wrap=tk.WORD)
+        self.file_list_text.grid(row=10, column=0, columnspan=2, pady=2, sticky="ew")
+
+    def create_action_buttons_section(self):
+        frame = ttk.Frame(self.root)
+        frame.grid(row=11, column=0, columnspan=2, pady=2, sticky="ew")
+
+        self.action_button = ttk.Button(frame, text="Utwórz i kopiuj multimedia", command=self.start_file_operation)
+        self.action_button.grid(row=0, column=1, padx=5)
+
+        self.cancel_button = ttk.Button(frame, text="Anuluj", command=self.cancel_file_operation, state="disabled")
+        self.cancel_button.grid(row=0, column=2, padx=5)
+
+        queue_button = ttk.Button(frame, text="Dodaj do kolejki", command=self.add_to_queue)
+        queue_button.grid(row=0, column=3, padx=5)
+
+        run_queue_button = ttk.Button(frame, text="Uruchom kolejkę", command=self.run_queue)
+        run_queue_button.grid(row=0, column=4, padx=5)
+
+        self.plan_button = ttk.Button(frame, text="Podgląd planu",
+                                      command=lambda: self.start_file_operation(dry_run=True))
+        self.plan_button.grid(row=0, column=5, padx=5)
+
+        self.progress_bar = ttk.Progressbar(frame, orient="horizontal", length=400, mode="determinate")
+        self.progress_bar.grid(row=1, column=0, columnspan=6, pady=2, sticky="ew")
+
+        self.progress_label = ttk.Label(frame, text="")
+        self.progress_label.grid(row=2, column=0, columnspan=6, sticky="w")
+
+    def create_queue_section(self):
+        self.queue_frame = ttk.Frame(self.root)
+        self.queue_frame.grid(row=13, column=0, columnspan=2, pady=2, sticky="ew")
+
+    def create_footer_section(self):
+        canvas = tk.Canvas(self.root, height=40, bg="#D3D3D3", highlightthickness=0)
+        canvas.grid(row=12, column=1, sticky="se")
+
+        self.footer_text = canvas.create_text(250, 20, text="Jarek J.", font=("Calibri", 10), anchor="e")
+
+        canvas.tag_bind(self.footer_text, '<Double-1>', self.show_footer_popup)
+
+    @staticmethod
+    def show_footer_popup(_):
+        messagebox.showinfo("Info", "Jarosław Jankowski - 2024r")
+
+    def load_sources(self):
+        run_in_background(self.root, load_sources, self.set_sources)
+
+    def set_sources(self, sources):
+        # Źródła dodane w formularzu, zanim plik został wczytany, nie mogą zniknąć
+        self.sources = sources + [source for source in self.sources if source not in sources]
+        self.source_combobox["values"] = self.sources
+
+    def add_source(self):
+        new_source = simpledialog.askstring("Dodaj nowe źródło", "Wprowadź nazwę źródła (np. Telewizor Pokój):")
+        if new_source:
+            short_name = simpledialog.askstring("Skrót", "Podaj skróconą nazwę (np. Tel_Pok):")
+            if short_name:
+                source_entry = f"{new_source} ({short_name})"
+                self.sources.append(source_entry)
+                self.source_combobox["values"] = self.sources
+                self.save_sources()
+
+    def remove_source(self):
+        selected_source = self.source_combobox.get()
+        confirm = messagebox.askyesno("Potwierdzenie", f"Czy na pewno chcesz usunąć źródło '{selected_source}'?")
+        if confirm:
+            if selected_source in self.sources:
+                self.sources.remove(selected_source)
+                self.source_combobox.set('')
+                self.source_combobox["values"] = self.sources
+                self.save_sources()
+                messagebox.showinfo("Sukces", f"Źródło '{selected_source}' zostało usunięte.")
+            else:
+                messagebox.showwarning("Błąd", "Nie wybrano źródła lub źródło nie istnieje na liście.")
+
+    def save_sources(self):
+        save_sources(self.sources)
+
+    def browse_media_path(self):
+        path = filedialog.askdirectory()
+        if path:
+            self.media_path_var.set(path)
+            self.start_card_scan(path)
+
+    def start_card_scan(self, path):
+        if self.scanner is not None:
+            self.scanner.cancel()
+        self.manifest = None
+        self.selection = None
+        self.file_info_label.config(text="Zawartość: skanowanie...")
+        self.scanner = CardScanner(path, self.date_workers_var.get())
+        self.scanner.start()
+        self.root.after(100, self.poll_scanner, self.scanner)
+
+    def poll_scanner(self, scanner):
+        # Skan zastąpiony nowym (wybrano inną ścieżkę) - jego wyniki są nieaktualne
+        if scanner is not self.scanner:
+            return
+        progress = None
+        try:
+            while True:
+                event = scanner.events.get_nowait()
+                kind = event["event"]
+                if kind == "progress":
+                    progress = event
+                elif kind == "scanned":
+                    progress = None
+                    self.display_file_info(event["manifest"])
+                elif kind == "analyzed":
+                    # Manifest trafia do formularza dopiero po analizie - wtedy wątek skanu już go nie zmienia
+                    self.scanner = None
+                    self.manifest = event["manifest"]
+                    self.analyze_files(self.manifest)
+                    return
+                elif kind == "error":
+                    self.scanner = None
+                    messagebox.showerror("Błąd", event["message"])
+                    return
+        except queue.Empty:
+            pass
+        if progress is not None:
+            self.file_info_label.config(text=f"Zawartość (skanowanie...): Liczba plików: {progress['files']}, "
+                                             f"Łączny rozmiar: {progress['bytes'] / (1024 * 1024):.2f} MB")
+        self.root.after(100, self.poll_scanner, scanner)
+
+    def toggle_card_watcher(self):
+        if self.watch_cards_var.get():
+            self.card_watcher = CardWatcher(self.card_events.put)
+            self.card_watcher.start()
+            self.root.after(500, self.poll_card_watcher, self.card_watcher)
+        elif self.card_watcher is not None:
+            self.card_watcher.stop()
+            self.card_watcher = None
+
+    def poll_card_watcher(self, watcher):
+        if watcher is not self.card_watcher:
+            return
+        try:
+            while True:
+                self.on_card_inserted(self.card_events.get_nowait())
+        except queue.Empty:
+            pass
+        self.root.after(500, self.poll_card_watcher, watcher)
+
+    # Rozpoznana karta wypełnia formularz i od razu jest skanowana w tle; import uruchamia użytkownik
+    def on_card_inserted(self, event):
+        if event["source"] is None or (self.worker is not None and self.worker.is_alive()):
+            return
+        if event["source"] not in self.sources:
+            self.sources.append(event["source"])
+            self.source_combobox["values"] = self.sources
+        self.source_var.set(event["source"])
+        self.media_path_var.set(event["path"])
+        self.start_card_scan(event["path"])
+        self.root.deiconify()
+        self.root.lift()
+
+    def remember_card(self):
+        media_path = self.media_path_var.get()
+        source_entry = self.source_var.get()
+        if not media_path or not source_entry:
+            messagebox.showwarning("Błąd", "Wybierz źródło i ścieżkę do karty.")
+            return
+        try:
+            # Znacznik w głównym katalogu karty - tam szuka go obserwator, nawet gdy wybrano np. DCIM
+            write_card_marker(get_mount_point(media_path), source_entry)
+        except OSError as e:
+            messagebox.showerror("Błąd", f"Nie można zapisać znacznika na karcie: {e}")
+            return
+        messagebox.showinfo("Sukces", f"Karta będzie rozpoznawana jako '{source_entry}'.")
+
+    def open_preview(self):
+        if self.manifest is None or self.manifest.root != self.media_path_var.get():
+            messagebox.showinfo("Podgląd karty", "Wybierz kartę i poczekaj na zakończenie jej analizy.")
+            return
+        PreviewWindow(self, self.manifest, self.selection)
+
+    # Pliki wybrane w podglądzie karty; wybór wszystkich plików oznacza zwykły import całej karty
+    def set_selection(self, manifest, selected):
+        self.selection = set(selected) if len(selected) < len(manifest) else None
+        self.display_file_info(manifest)
+
+    def current_selection(self, source_path):
+        if self.manifest is not None and self.manifest.root == source_path:
+            return self.selection
+        return None
+
+    def display_file_info(self, manifest):
+        text = (f"Zawartość: Liczba plików: {len(manifest)}, Łączny rozmiar: "
+                f"{manifest.total_size / (1024 * 1024):.2f} MB")
+        if self.selection is not None:
+            text += f", wybrano do importu: {len(self.selection)}"
+        self.file_info_label.config(text=text)
+
+    # Manifest z datami odczytanymi w tle przez CardScanner
+    def analyze_files(self, manifest):
+        counts = manifest.origin_counts()
+        exif_count = counts[DATE_ORIGIN_EXIF]
+        filename_count = counts[DATE_ORIGIN_FILENAME]
+        creation_date_count = counts[DATE_ORIGIN_CREATION]
+        unique_dates = manifest.unique_dates()
+
+        if len(unique_dates) > 1:
+            self.naming_var.set("Zakres dat i źródło")
+            self.subfolder_var.set("Twórz podkatalogi na każdy dzień")
+        else:
+            self.naming_var.set("Data i źródło")
+
+        if exif_count > 0:
+            self.date_source_var.set("EXIF")
+        elif filename_count > 0:
+            self.date_source_var.set("Nazwa pliku")
+        else:
+            self.date_source_var.set("Właściwości pliku")
+
+        dates_info = ", ".join(sorted([date.strftime("%Y-%m-%d") for date in unique_dates]))
+        messagebox.showinfo("Analiza plików",
+                            f"Liczba plików: {len(manifest)}\n"
+                            f"Pliki z datą EXIF: {exif_count}\n"
+                            f"Pliki z datą w nazwie: {filename_count}\n"
+                            f"Pliki z datą utworzenia: {creation_date_count}\n"
+                            f"Unikalne daty plików: {dates_info}")
+
+    def browse_dest_path(self):
+        path = filedialog.askdirectory()
+        if path:
+            self.dest_path_var.set(path)
+
+    def start_file_operation(self, dry_run=False):
+        if self.worker is not None and self.worker.is_alive():
+            return
+
+        source_path = self.media_path_var.get()
+        dest_path = self.dest_path_var.get()
+
+        if not source_path or not dest_path:
+            messagebox.showwarning("Błąd", "Ścieżki muszą być wybrane.")
+            return
+
+        job = None
+        # Import przerwany awarią lub anulowaniem - można go dokończyć bez ponownego kopiowania
+        for folder in ([] if dry_run else ImportJournal.find_unfinished(dest_path)):
+            answer = messagebox.askyesnocancel("Przerwany import",
+                                               f"W katalogu {folder} jest niedokończony import.\n"
+                                               f"Wznowić go zamiast rozpoczynać nowy?")
+            if answer is None:
+                return
+            if answer:
+                job = ImportJob.resume(folder)
+                break
+        if job is None:
+            job = ImportJob(source_path, dest_path, dict(self.collect_options(), dry_run=dry_run), self.manifest,
+                            selection=self.current_selection(source_path))
+
+        self.progress_total_files = 0
+        self.progress_total_bytes = 0
+        self.progress_done_files = 0
+        self.progress_done_bytes = 0
+        self.progress_start_time = None
+        self.progress_bar["value"] = 0
+        self.progress_bar["maximum"] = 1
+        self.action_button.config(state="disabled")
+        self.plan_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        if dry_run:
+            self.file_list_text.delete("1.0", tk.END)
+
+        self.worker = ImportWorker(job)
+        self.worker.start()
+        self.root.after(100, self.poll_worker)
+
+    # Ustawienia odczytane w wątku Tk - wątek roboczy nie dotyka zmiennych formularza
+    def collect_options(self):
+        return {
+            "operation": self.operation_var.get(),
+            "buffer": self.buffer_var.get(),
+            "use_exif": self.use_exif_var.get(),
+            "date_workers": self.date_workers_var.get(),
+            "naming": self.naming_var.get(),
+            "source_short": get_short_name_from_source(self.source_var.get()),
+            "source_entry": self.source_var.get(),
+            "incremental": self.incremental_var.get(),
+            "verify": self.verify_var.get(),
+            "duplicates": self.duplicates_var.get(),
+            "suffix": self.suffix_var.get(),
+            "subfolder": self.subfolder_var.get(),
+            "log": self.log_file_var.get(),
+            "profile": self.profile_var.get(),
+        }
+
+    def cancel_file_operation(self):
+        if self.worker is not None and self.worker.is_alive():
+            self.worker.cancel()
+            self.cancel_button.config(state="disabled")
+            self.progress_label.config(text="Przerywanie po bieżącym pliku...")
+        if self.scheduler_thread is not None and self.scheduler_thread.is_alive():
+            self.scheduler.cancel()
+            self.cancel_button.config(state="disabled")
+
+    def queue_running(self):
+        return self.scheduler_thread is not None and self.scheduler_thread.is_alive()
+
+    def add_to_queue(self):
+        if self.queue_running():
+            return
+
+        source_path = self.media_path_var.get()
+        dest_path = self.dest_path_var.get()
+
+        if not source_path or not dest_path:
+            messagebox.showwarning("Błąd", "Ścieżki muszą być wybrane.")
+            return
+
+        # Wiersze z poprzedniego przebiegu kolejki
+        if not self.queued_jobs:
+            for row in self.queue_rows:
+                row.destroy()
+            self.queue_rows = []
+
+        manifest = self.manifest if self.manifest is not None and self.manifest.root == source_path else None
+        self.queued_jobs.append(ImportJob(source_path, dest_path, self.collect_options(), manifest,
+                                          selection=self.current_selection(source_path)))
+        title = f"{get_short_name_from_source(self.source_var.get()) or '-'}: {source_path}"
+        self.queue_rows.append(QueueRow(self.queue_frame, len(self.queue_rows), title))
+
+    def run_queue(self):
+        if self.queue_running() or not self.queued_jobs:
+            return
+
+        for index, job in enumerate(self.queued_jobs):
+            job.report = lambda event, job_index=index: self.queue_events.put((job_index, event))
+        self.scheduler = ImportScheduler(self.queued_jobs)
+        self.queued_jobs = []
+        self.scheduler_thread = threading.Thread(target=self.scheduler.run, daemon=True)
+        self.scheduler_thread.start()
+        self.cancel_button.config(state="normal")
+        self.root.after(100, self.poll_queue)
+
+    def poll_queue(self):
+        try:
+            while True:
+                index, event = self.queue_events.get_nowait()
+                self.queue_rows[index].apply(event)
+        except queue.Empty:
+            pass
+
+        if self.queue_running():
+            self.root.after(100, self.poll_queue)
+            return
+
+        self.cancel_button.config(state="disabled")
+        # Przeniesione pliki zniknęły z kart - manifest wybranej karty jest nieaktualny
+        if any(job.options["operation"] == OPERATION_MOVE for job in self.scheduler.jobs):
+            self.manifest = None
+        copied = sum(result.copied_count for result in self.scheduler.results if result)
+        errors = sum(1 for error in self.scheduler.errors if error)
+        messagebox.showinfo("Kolejka importów", f"Zakończono zadania: {len(self.scheduler.jobs)}\n"
+                                                f"Skopiowano plików: {copied}\n"
+                                                f"Zadania z błędem: {errors}")
+
+    def poll_worker(self):
+        lines = []
+        final_event = None
+        try:
+            while final_event is None:
+                event = self.worker.events.get_nowait()
+                kind = event["event"]
+                if kind == "status":
+                    self.progress_label.config(text=event["message"])
+                elif kind == "manifest":
+                    self.manifest = event["manifest"]
+                elif kind == "start":
+                    self.progress_total_files = event["files"]
+                    self.progress_total_bytes = event["bytes"]
+                    self.progress_bar["maximum"] = max(event["bytes"], 1)
+                    self.progress_start_time = time.monotonic()
+                elif kind == "file":
+                    lines.append(f"Skopiowano: {event['path']}\n")
+                    self.progress_done_files += 1
+                    self.progress_done_bytes += event["size"]
+                elif kind == "duplicate":
+                    lines.append(f"Duplikat pominięty: {event['path']} (w archiwum: {event['duplicate_of']})\n")
+                    self.progress_done_files += 1
+                    self.progress_done_bytes += event["size"]
+                elif kind == "log":
+                    lines.append(f"\nLog zapisany: {event['path']}\n")
+                elif kind == "checksums":
+                    lines.append(f"Sumy kontrolne zapisane: {event['path']}\n")
+                elif kind == "planned":
+                    lines.append(f"{event['path']} -> {event['dest']}\n")
+                elif kind == "plan":
+                    lines.append(f"\nPlan: {event['files']} plików, {event['bytes'] / (1024 * 1024):.2f} MB, "
+                                 f"katalogów dni: {event['directories']}, zmienione nazwy: {event['renamed']}\n"
+                                 f"Katalog docelowy: {event['folder']}\n")
+                elif kind == "resumable":
+                    lines.append(f"\nImport przerwany - można go wznowić: {event['path']}\n")
+                elif kind == "profile":
+                    lines.append(f"Profil cProfile zapisany: {event['path']}\n")
+                elif kind == "warning":
+                    messagebox.showwarning("Błąd", event["message"])
+                elif kind in ("finished", "error"):
+                    final_event = event
+        except queue.Empty:
+            pass
+
+        # Jedno wstawienie tekstu na paczkę zdarzeń zamiast jednego na plik
+        if lines:
+            self.file_list_text.insert(tk.END, "".join(lines))
+            self.file_list_text.see(tk.END)
+        if self.progress_start_time is not None:
+            self.update_progress()
+
+        if final_event is None:
+            self.root.after(100, self.poll_worker)
+        else:
+            self.action_button.config(state="normal")
+            self.plan_button.config(state="normal")
+            self.cancel_button.config(state="disabled")
+            if final_event["event"] == "error":
+                self.progress_label.config(text="")
+                messagebox.showerror("Błąd", final_event["message"])
+            else:
+                self.finish_file_operation(final_event["result"])
+
+    def update_progress(self):
+        self.progress_bar["value"] = self.progress_done_bytes
+        elapsed = time.monotonic() - self.progress_start_time
+        speed = self.progress_done_bytes / elapsed if elapsed > 0 else 0
+        text = (f"{self.progress_done_files}/{self.progress_total_files} plików, "
+                f"{self.progress_done_bytes / (1024 * 1024):.2f}/{self.progress_total_bytes / (1024 * 1024):.2f} MB, "
+                f"{speed / (1024 * 1024):.2f} MB/s")
+        if speed > 0 and self.progress_done_bytes < self.progress_total_bytes:
+            eta = (self.progress_total_bytes - self.progress_done_bytes) / speed
+            text += f", pozostało: {format_duration(eta)}"
+        self.progress_label.config(text=text)
+
+    def finish_file_operation(self, result):
+        if self.worker.job.options["dry_run"]:
+            self.progress_label.config(text="Podgląd planu - żaden plik nie został skopiowany.")
+            return
+        try:
+            self.show_summary(result.copied_count, result.total_size, result.manifest,
+                              result.skipped_count, result.duplicate_count)
+
+            # Import przyrostowy bez nowych plików - nie powstaje żaden katalog
+            if result.dest_folder and self.open_folder_var.get():
+                self.open_folder(result.dest_folder)
+
+            # Pliki przeniesione nie istnieją już na karcie - kolejny import wymaga nowego skanu
+            if self.worker.job.options["operation"] == OPERATION_MOVE:
+                self.manifest = None
+
+            if result.cancelled:
+                messagebox.showwarning("Przerwano", "Operacja została przerwana przez użytkownika.")
+            else:
+                messagebox.showinfo("Sukces", "Operacja zakończona pomyślnie.")
+        except Exception as e:
+            messagebox.showerror("Błąd", f"Wystąpił błąd: {e}")
+
+    @staticmethod
+    def show_summary(copied_count, total_size, manifest, skipped_count=0, duplicate_count=0):
+        source_file_count = len(manifest)
+        source_total_size = manifest.total_size
+
+        messagebox.showinfo("Podsumowanie",
+                            f"Skopiowano plików: {copied_count}\n"
+                            f"Łączny rozmiar: {total_size / (1024 * 1024):.2f} MB\n"
+                            f"Pominięto (już w archiwum): {skipped_count}\n"
+                            f"Pominięte duplikaty: {duplicate_count}\n\n"
+                            f"W katalogu źródłowym: {source_file_count} plików\n"
+                            f"Łączny rozmiar: {source_total_size / (1024 * 1024):.2f} MB")
+
+    @staticmethod
+    def open_folder(path):
+        if os.name == 'nt':  # Windows
+            os.startfile(path)
+        elif os.name == 'posix':  # macOS or Linux
+            subprocess.Popen(['xdg-open', path])
+